@@ -12,11 +12,34 @@ from sklearn.metrics import silhouette_score
 def load_data():
     conn=sqlite3.connect("usage_log.db")
     # reading data into pandas dataframe
-    df = pd.read_sql_query("SELECT * FROM usage_log", conn)
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(usage_log)")}
+    if "ts_ms" in columns:
+        # Migrated schema: integer epoch ms, indexed
+        df = pd.read_sql_query("SELECT ts_ms, cpu, memory, disk, battery FROM usage_log ORDER BY ts_ms", conn)
+        df["timestamp"] = pd.to_datetime(df.pop("ts_ms"), unit="ms")
+    else:
+        df = pd.read_sql_query("SELECT * FROM usage_log", conn)
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
     conn.close()
     return df
 
+def load_hourly():
+    # Hourly means from the usage_1h rollup that the Pi client maintains;
+    # None for databases without it. run_prediction/run_kmeans resample to
+    # 1h, which leaves this frame as it is.
+    conn=sqlite3.connect("usage_log.db")
+    try:
+        has_rollup = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='usage_1h'").fetchone()
+        if not has_rollup:
+            return None
+        cols = ", ".join(f"total({m}_sum) / nullif(sum({m}_n), 0) AS {m}" for m in ['cpu','memory','disk','battery'])
+        df = pd.read_sql_query(f"SELECT bucket_ms, {cols} FROM usage_1h GROUP BY bucket_ms ORDER BY bucket_ms", conn)
+    finally:
+        conn.close()
+    df["timestamp"] = pd.to_datetime(df.pop("bucket_ms"), unit="ms")
+    return df
+
 # Function to show matplotlib graphs for weekly usage
 def show_graphs(df):
     plt.figure(figsize=(12,6))
@@ -48,21 +71,30 @@ def show_daily_stats(df):
     print("\nDaily Stats:")
     print(daily_stats)
 
-def weekly_summary(df):
-    one_week= pd.Timestamp.now()-pd.Timedelta(days=7)
-    last_week=df[df['timestamp'] >= one_week]
-
-    avg_cpu= last_week['cpu'].mean()
-    peak_cpu= last_week['cpu'].max()
-
-    avg_memory = last_week['memory'].mean()
-    peak_memory = last_week['memory'].max()
-
-    avg_disk = last_week['disk'].mean()
-    peak_disk = last_week['disk'].max()
+def weekly_stats_sql():
+    # Mean/peak over the last 7 days computed by SQLite on the ts_ms index;
+    # None for databases still on the text-timestamp schema
+    conn=sqlite3.connect("usage_log.db")
+    try:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(usage_log)")}
+        if "ts_ms" not in columns:
+            return None
+        since_ms = int((datetime.datetime.now().timestamp() - 7 * 86400) * 1000)
+        row = conn.execute(
+            "SELECT avg(cpu), max(cpu), avg(memory), max(memory), avg(disk), max(disk), avg(battery), max(battery) "
+            "FROM usage_log WHERE ts_ms >= ?", (since_ms,)).fetchone()
+        # Empty window: NaN like the pandas path prints
+        return [float("nan") if v is None else v for v in row]
+    finally:
+        conn.close()
 
-    avg_battery = last_week['battery'].mean()
-    peak_battery = last_week['battery'].max()
+def weekly_summary(df):
+    stats = weekly_stats_sql()
+    if stats is None:
+        one_week= pd.Timestamp.now()-pd.Timedelta(days=7)
+        last_week=df[df['timestamp'] >= one_week]
+        stats = [agg(last_week[m]) for m in ['cpu','memory','disk','battery'] for agg in (pd.Series.mean, pd.Series.max)]
+    avg_cpu, peak_cpu, avg_memory, peak_memory, avg_disk, peak_disk, avg_battery, peak_battery = stats
 
     print(f"Weekly Summary (last 7 days):")
     print(f"Average CPU Usage: {avg_cpu:.2f}%, Peak CPU Usage: {peak_cpu:.2f}%")
@@ -278,6 +310,10 @@ def predict_and_analyze(df):
 
 def main():
     df = load_data()
+    # Prediction and clustering work on hourly means; read them pre-aggregated when we can
+    hourly = load_hourly()
+    if hourly is None:
+        hourly = df
 
     while True:
         print("\n=== System Monitoring Viewer ===")
@@ -296,15 +332,15 @@ def main():
         elif choice == '2':
             weekly_summary(df)
         elif choice == '3':
-            run_prediction(df)
+            run_prediction(hourly)
         elif choice == '4':
             show_daily_stats(df)
         elif choice == '5':
-            run_kmeans(df)
+            run_kmeans(hourly)
         elif choice == '6':
             break
         elif choice == '7':
-            predict_and_analyze(df)
+            predict_and_analyze(hourly)
         else:
             print("Invalid choice! Please enter 1-7.")
 
@@ -0,0 +1,43 @@
+# Micro-benchmark: per-sample cost of the Linux fast path vs psutil.
+# Run from the repo root:  python -m pc_server.bench_monitors
+import os
+import timeit
+
+import psutil
+
+from .monitors import linux_fastpath
+
+N = 5000
+
+
+def bench(label, fn, n=N):
+    fn()  # warm up
+    total = timeit.timeit(fn, number=n)
+    us = total / n * 1e6
+    print(f"{label:<28} {us:8.2f} us/sample")
+    return us
+
+
+def main():
+    if not linux_fastpath.ENABLED:
+        print("Fast path disabled on this platform; nothing to compare.")
+        return
+
+    cases = [
+        ("cpu", lambda: psutil.cpu_percent(interval=None), linux_fastpath.cpu_reader()),
+        ("memory", lambda: psutil.virtual_memory().percent, linux_fastpath.mem_reader()),
+        ("battery", psutil.sensors_battery, linux_fastpath.battery_reader()),
+    ]
+
+    print(f"pid={os.getpid()}  samples={N}")
+    for name, slow, reader in cases:
+        slow_us = bench(f"{name} (psutil)", slow)
+        if reader is None:
+            print(f"{name + ' (fast path)':<28} unavailable")
+            continue
+        fast_us = bench(f"{name} (fast path)", reader.percent)
+        print(f"{'':<28} {slow_us / fast_us:8.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import asyncio
+from collections import defaultdict
+
+from .delta_codec import DeltaEncoder
+from .delivery import ClientOutbox, StreamFrame
+from .history import HistoryBuffer
+from .system_monitor import METRICS
+from shared import wire_format
+
+# Metric groups clients can subscribe to, and the stats fields in each
+GROUPS = {
+    "core": ["cpu", "memory", "disk", "battery"],
+    "io": ["disk_read_bps", "disk_write_bps", "net_rx_bps", "net_tx_bps"],
+    "devices": ["disks", "disk_io", "net_io"],
+    "window": ["window", "window_samples"],
+}
+
+# Rate tiers in seconds; every tier must be a multiple of the fastest one
+TIERS = {"250ms": 0.25, "1s": 1.0, "5s": 5.0}
+DEFAULT_TIER = "5s"
+
+# History keeps one row per HISTORY_TIER tick for replay after reconnects
+HISTORY_TIER = "1s"
+HISTORY_CAPACITY = 3600
+
+
+class Broadcaster:
+    """
+    Fans stats out to clients grouped by (group, tier, format) subscription.
+
+    Each (group, tier) stream has one DeltaEncoder, and each frame is
+    serialised once per format that has members (JSON included, as a
+    text string), so encoding cost scales with the number of distinct
+    subscriptions rather than the number of connected clients. Per client,
+    python-socketio only wraps the finished payload in a packet. Streams
+    with no members are skipped. Frames reach each client through its
+    ClientOutbox rather than a Socket.IO room, because every client acks
+    and conflates on its own, so a slow client only conflates its own
+    frames. A reconnecting client can pass the last
+    history seq it stored and gets the missed rows as one stats_replay
+    batch before live frames resume.
+    """
+
+    def __init__(self, sio, sampler, keyframe_every=12, precision=1, on_history=None):
+        self.sio = sio
+        self.sampler = sampler
+        self.keyframe_every = keyframe_every
+        self.precision = precision
+        self.subs = {}  # sid -> (groups, tier, fmt)
+        self.members = defaultdict(set)  # (group, tier, fmt) -> sids
+        self.encoders = {}  # (group, tier) -> DeltaEncoder
+        self.outboxes = {}  # sid -> ClientOutbox
+        self.history = HistoryBuffer(METRICS, capacity=HISTORY_CAPACITY)
+        self.on_history = on_history  # called with each new history row
+        self.base = min(TIERS.values())
+        self.last_tick_offered = 0
+
+    def _encoder(self, group, tier):
+        enc = self.encoders.get((group, tier))
+        if enc is None:
+            enc = DeltaEncoder(keyframe_every=self.keyframe_every, precision=self.precision)
+            self.encoders[(group, tier)] = enc
+        return enc
+
+    async def subscribe(self, sid, groups, tier, fmt, since=None, epoch=None):
+        groups = [g for g in groups if g in GROUPS]
+        if tier not in TIERS:
+            tier = DEFAULT_TIER
+        self.unsubscribe(sid)
+
+        # Replay goes out before the client joins any live stream
+        if since is not None and epoch == self.history.epoch:
+            stride = max(1, round(TIERS[tier] / TIERS[HISTORY_TIER]))
+            batch = self.history.batch(since, stride)
+            if batch["rows"]:
+                await self.sio.emit("stats_replay", wire_format.encode(batch, fmt), to=sid)
+
+        self.subs[sid] = (groups, tier, fmt)
+        # A fresh outbox has no acked seq, so every stream starts with a keyframe
+        self.outboxes[sid] = ClientOutbox(self.sio, sid, fmt)
+        for group in groups:
+            self.members[(group, tier, fmt)].add(sid)
+        return {
+            "groups": groups,
+            "tier": tier,
+            "format": fmt,
+            "epoch": self.history.epoch,
+            "h": self.history.seq,
+        }
+
+    def unsubscribe(self, sid):
+        old = self.subs.pop(sid, None)
+        self.outboxes.pop(sid, None)
+        if old is None:
+            return
+        groups, tier, fmt = old
+        for group in groups:
+            key = (group, tier, fmt)
+            self.members[key].discard(sid)
+            if not self.members[key]:
+                del self.members[key]
+
+    def request_keyframe(self, sid, group=None):
+        outbox = self.outboxes.get(sid)
+        if outbox is not None:
+            outbox.reset(group)
+
+    async def _emit_tier(self, tier):
+        sids_by_group = defaultdict(list)
+        for (group, t, _), sids in self.members.items():
+            if t == tier:
+                sids_by_group[group].extend(sids)
+        if not sids_by_group:
+            return 0
+
+        stats = self.sampler.frame(tier)
+        offered = 0
+        for group, sids in sids_by_group.items():
+            fields = {k: stats[k] for k in GROUPS[group] if k in stats}
+            encoder = self._encoder(group, tier)
+            frame = StreamFrame(group, encoder.encode(fields), encoder.keyframe(),
+                                self.history.seq, self.sampler.latest_ts_ms)
+            for sid in sids:
+                await self.outboxes[sid].offer(frame)
+                offered += 1
+        return offered
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        await self.sampler.next_sample()
+        every = {tier: round(period / self.base) for tier, period in TIERS.items()}
+        tick = 0
+        start = loop.time()
+        while True:
+            if tick % every[HISTORY_TIER] == 0 and self.sampler.latest:
+                self.history.append(self.sampler.latest_ts_ms, self.sampler.latest)
+                if self.on_history is not None:
+                    self.on_history(self.history.rows[-1])
+
+            offered = 0
+            for tier, n in every.items():
+                if tick % n == 0:
+                    offered += await self._emit_tier(tier)
+            self.last_tick_offered = offered
+
+            if tick % every[DEFAULT_TIER] == 0:
+                for outbox in list(self.outboxes.values()):
+                    await outbox.expire()
+
+            # Absolute deadlines so emit time does not add to the period
+            tick += 1
+            await asyncio.sleep(max(0.0, start + tick * self.base - loop.time()))
+
+    def stats(self):
+        return {
+            "clients": len(self.subs),
+            "subscriptions": len(self.members),
+            "streams": len({(g, t) for g, t, _ in self.members}),
+            "last_tick_offered": self.last_tick_offered,
+            "history_seq": self.history.seq,
+            "history_rows": len(self.history.rows),
+            "delivery": {sid: outbox.stats() for sid, outbox in self.outboxes.items()},
+        }
@@ -1,6 +1,7 @@
+import os
 import sqlite3
 
-DB_PATH = "pc-server/data/brother_eye.db"
+DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "brother_eye.db")
 
 conn = sqlite3.connect(DB_PATH)
 cursor = conn.cursor()
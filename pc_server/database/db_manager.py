@@ -1,11 +1,31 @@
+import os
 import sqlite3
+import time
 
-DB_PATH = "pc_server/data/brother_eye.db"
+from shared.db_writer import DbWriter
+from ..system_monitor import METRICS
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(os.path.dirname(BASE_DIR), "data", "brother_eye.db")
+
+# Columns after ts_ms, in the order rows are handed to insert_rows();
+# the same order as the broadcaster's history rows
+COLUMNS = list(METRICS)
+
+INSERT_SQL = (
+    f"INSERT INTO usage_log (ts_ms, timestamp, {', '.join(COLUMNS)}) "
+    f"VALUES (?1, strftime('%Y-%m-%d %H:%M:%S', ?1 / 1000.0, 'unixepoch'), "
+    f"{', '.join('?' for _ in COLUMNS)})"
+)
+
+_writer = None  # DbWriter, started by init_db()
 
 def init_db():
     conn = None
     try:
+        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
         conn = sqlite3.connect(DB_PATH)
+        conn.execute("PRAGMA journal_mode=WAL")
         cursor = conn.cursor()
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS usage_log (
@@ -16,25 +36,53 @@ def init_db():
                 battery REAL
             )
         """)
+        # Tables from before ts_ms and the throughput columns
+        existing = {row[1] for row in cursor.execute("PRAGMA table_info(usage_log)")}
+        for col in ["ts_ms"] + COLUMNS:
+            if col not in existing:
+                kind = "INTEGER" if col == "ts_ms" else "REAL"
+                cursor.execute(f"ALTER TABLE usage_log ADD COLUMN {col} {kind}")
+        cursor.execute("CREATE INDEX IF NOT EXISTS usage_log_ts_ms ON usage_log (ts_ms)")
         conn.commit()
     except Exception as e:
         print("Error initializing DB:", e)
+        return
     finally:
         if conn:
             conn.close()
 
+    global _writer
+    if _writer is None:
+        _writer = DbWriter(DB_PATH, INSERT_SQL)
+
+def insert_rows(rows):
+    """
+    Queue rows of (ts_ms, *COLUMNS) for the writer thread. Never blocks,
+    so it is safe to call from the event loop.
+    """
+    if _writer is not None:
+        _writer.put(rows)
+
 def insert_stats(cpu, memory, disk, battery):
-    conn = None
+    insert_rows([(int(time.time() * 1000), cpu, memory, disk, battery) + (None,) * (len(COLUMNS) - 4)])
+
+def query_range(start_ms, end_ms, limit=3600):
+    """Rows with start_ms <= ts_ms < end_ms, oldest first, as (ts_ms, *COLUMNS)."""
+    # A connection per query; WAL lets it read while the writer commits
+    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO usage_log (cpu, memory, disk, battery) VALUES (?, ?, ?, ?)",
-            (cpu, memory, disk, battery)
-        )
-        conn.commit()
-    except Exception as e:
-        print("Error inserting stats:", e)
+        return conn.execute(
+            f"SELECT ts_ms, {', '.join(COLUMNS)} FROM usage_log "
+            "WHERE ts_ms >= ? AND ts_ms < ? ORDER BY ts_ms LIMIT ?",
+            (start_ms, end_ms, limit),
+        ).fetchall()
     finally:
-        if conn:
-            conn.close()
+        conn.close()
+
+def writer_stats():
+    return _writer.stats() if _writer is not None else None
+
+def close():
+    """Flush queued rows; call on shutdown."""
+    if _writer is not None:
+        _writer.close()
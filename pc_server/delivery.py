@@ -0,0 +1,233 @@
+import time
+
+from shared import wire_format
+
+# A frame that is not acknowledged within this time counts as dropped
+ACK_TIMEOUT = 10.0
+
+
+class StreamFrame:
+    """
+    One tick of one (group, tier) stream. Payloads are serialised lazily and
+    at most once per (format, keyframe) pair, however many clients get them.
+    """
+
+    def __init__(self, group, delta, keyframe, history_seq, ts_ms):
+        self.group = group
+        self.seq = delta["seq"]
+        self.base = delta.get("base")
+        # h lets the client ask for a replay from this point after a reconnect;
+        # t is the sample's collection time in epoch ms
+        self._frames = {
+            False: dict(delta, g=group, h=history_seq, t=ts_ms),
+            True: dict(keyframe, g=group, h=history_seq, t=ts_ms),
+        }
+        self._payloads = {}
+
+    def payload(self, fmt, key):
+        if self.base is None:
+            key = False  # already a keyframe
+        cached = self._payloads.get((fmt, key))
+        if cached is None:
+            cached = wire_format.encode(self._frames[key], fmt)
+            self._payloads[(fmt, key)] = cached
+        return cached
+
+
+class _Slot:
+    __slots__ = ("last_seq", "inflight", "sent_at", "pending")
+
+    def __init__(self):
+        self.last_seq = None  # last seq the client acknowledged
+        self.inflight = None  # StreamFrame awaiting ack
+        self.sent_at = 0.0
+        self.pending = None  # newest StreamFrame waiting for the slot
+
+
+class ClientOutbox:
+    """
+    Latest-value-wins delivery for one client.
+
+    Each stream the client subscribes to has a single in-flight frame. While
+    it waits for the client's ack, newer frames replace each other in one
+    pending slot (conflation) instead of queueing. A frame that does not
+    follow the last acknowledged seq goes out as a keyframe, so conflated
+    deltas never corrupt the client's state. A slow client only loses
+    freshness; nothing it does delays the tick or other clients.
+    """
+
+    def __init__(self, sio, sid, fmt, clock=time.monotonic):
+        self.sio = sio
+        self.sid = sid
+        self.fmt = fmt
+        self.clock = clock
+        self.slots = {}
+        self.delivered = 0
+        self.conflated = 0
+        self.dropped = 0
+        self.last_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        self._latency_total = 0.0
+
+    def _slot(self, group):
+        slot = self.slots.get(group)
+        if slot is None:
+            slot = self.slots[group] = _Slot()
+        return slot
+
+    def reset(self, group=None):
+        """Forget what the client has, so its next frame is a keyframe."""
+        for g, slot in self.slots.items():
+            if group is None or g == group:
+                slot.last_seq = None
+
+    async def offer(self, frame):
+        slot = self._slot(frame.group)
+        if slot.inflight is not None:
+            if slot.pending is not None:
+                self.conflated += 1
+            slot.pending = frame
+            return
+        await self._send(slot, frame)
+
+    async def _send(self, slot, frame):
+        key = slot.last_seq is None or frame.base != slot.last_seq
+        slot.inflight = frame
+        slot.sent_at = self.clock()
+        sent_at = slot.sent_at
+
+        def acked(*_):
+            return self._acked(slot, frame, sent_at)
+
+        await self.sio.emit("stats_update", frame.payload(self.fmt, key), to=self.sid, callback=acked)
+
+    async def _acked(self, slot, frame, sent_at):
+        if slot.inflight is not frame or slot.sent_at != sent_at:
+            return  # already written off as dropped
+        latency = (self.clock() - sent_at) * 1000
+        self.delivered += 1
+        self.last_latency_ms = latency
+        self.max_latency_ms = max(self.max_latency_ms, latency)
+        self._latency_total += latency
+
+        slot.last_seq = frame.seq
+        slot.inflight = None
+        if slot.pending is not None:
+            nxt, slot.pending = slot.pending, None
+            await self._send(slot, nxt)
+
+    async def expire(self, timeout=ACK_TIMEOUT):
+        now = self.clock()
+        for slot in self.slots.values():
+            if slot.inflight is not None and now - slot.sent_at > timeout:
+                self.dropped += 1
+                slot.inflight = None
+                slot.last_seq = None  # unknown what the client has
+                if slot.pending is not None:
+                    nxt, slot.pending = slot.pending, None
+                    await self._send(slot, nxt)
+
+    def stats(self):
+        return {
+            "format": self.fmt,
+            "delivered": self.delivered,
+            "conflated": self.conflated,
+            "dropped": self.dropped,
+            "last_latency_ms": round(self.last_latency_ms, 2),
+            "avg_latency_ms": round(self._latency_total / self.delivered, 2) if self.delivered else 0.0,
+            "max_latency_ms": round(self.max_latency_ms, 2),
+        }
+
+
+class TableFeed:
+    """
+    Per-client delivery of an incrementally updated table (process_update).
+
+    Updates are diffs, so unlike stats frames they cannot simply replace
+    each other. Each client has at most one update in flight; updates
+    published while it is unacknowledged are not queued but noted, and the
+    ack is answered with one full snapshot from `snapshot()`. A slow client
+    costs one pending flag, never a backlog. Each update is encoded once
+    per wire format, however many clients get it.
+    """
+
+    def __init__(self, sio, event, snapshot, clock=time.monotonic):
+        self.sio = sio
+        self.event = event
+        self.snapshot = snapshot
+        self.clock = clock
+        self.clients = {}  # sid -> _TableClient
+        self.sent = 0
+        self.conflated = 0
+        self.dropped = 0
+
+    def add(self, sid, fmt):
+        self.clients[sid] = _TableClient(fmt)
+
+    def remove(self, sid):
+        self.clients.pop(sid, None)
+
+    async def send_full(self, sid):
+        """Send the whole table now, or as soon as the in-flight update is acked."""
+        client = self.clients.get(sid)
+        if client is None:
+            return
+        if client.inflight:
+            client.stale = True
+            return
+        await self._send(sid, client, wire_format.encode(self._full(), client.fmt))
+
+    def _full(self):
+        return {"changed": self.snapshot(), "removed": [], "full": True}
+
+    async def publish(self, update):
+        payloads = {}
+        for sid, client in list(self.clients.items()):
+            if client.inflight:
+                if not client.stale:
+                    self.conflated += 1
+                client.stale = True
+                continue
+            payload = payloads.get(client.fmt)
+            if payload is None:
+                payload = payloads[client.fmt] = wire_format.encode(update, client.fmt)
+            await self._send(sid, client, payload)
+
+    async def _send(self, sid, client, payload):
+        client.inflight = True
+        client.sent_at = sent_at = self.clock()
+        self.sent += 1
+
+        async def acked(*_):
+            if self.clients.get(sid) is not client or client.sent_at != sent_at:
+                return  # client gone or already written off
+            client.inflight = False
+            if client.stale:
+                client.stale = False
+                await self.send_full(sid)
+
+        await self.sio.emit(self.event, payload, to=sid, callback=acked)
+
+    async def expire(self, timeout=ACK_TIMEOUT):
+        now = self.clock()
+        for sid, client in list(self.clients.items()):
+            if client.inflight and now - client.sent_at > timeout:
+                # Unknown what the client has, so it starts over from a snapshot
+                self.dropped += 1
+                client.inflight = False
+                client.stale = False
+                await self.send_full(sid)
+
+    def stats(self):
+        return {"clients": len(self.clients), "sent": self.sent,
+                "conflated": self.conflated, "dropped": self.dropped}
+
+
+class _TableClient:
+    __slots__ = ("fmt", "inflight", "stale", "sent_at")
+
+    def __init__(self, fmt):
+        self.fmt = fmt
+        self.inflight = False
+        self.stale = False  # missed updates; owed a full snapshot
+        self.sent_at = 0.0
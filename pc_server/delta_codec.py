@@ -0,0 +1,72 @@
+class DeltaEncoder:
+    """
+    Turns full stats dicts into keyframes and per-field deltas.
+
+    Floats are quantised to `precision` decimals before comparing, so noise
+    below the display precision never produces a delta. Nested dicts are
+    diffed recursively; keys that disappeared are listed as paths in "rm".
+
+    Frame layout:
+        keyframe: {"seq": n, "kf": 1, "d": <full state>}
+        delta:    {"seq": n, "base": n - 1, "d": <changed fields>, "rm": [[k, ...], ...]}
+    """
+
+    def __init__(self, keyframe_every=20, precision=1):
+        self.keyframe_every = keyframe_every
+        self.precision = precision
+        self.seq = 0
+        self._state = None
+        self._since_keyframe = 0
+        self._force_keyframe = False
+
+    def request_keyframe(self):
+        self._force_keyframe = True
+
+    def keyframe(self):
+        """Full state as of the last encoded frame, without disturbing the sequence."""
+        return {"seq": self.seq, "kf": 1, "d": self._state}
+
+    def _quantise(self, value):
+        if isinstance(value, float):
+            return round(value, self.precision)
+        if isinstance(value, dict):
+            return {k: self._quantise(v) for k, v in value.items()}
+        return value
+
+    def _diff(self, old, new, path, removed):
+        changed = {}
+        for k, v in new.items():
+            o = old.get(k, _MISSING)
+            if isinstance(v, dict) and isinstance(o, dict):
+                sub = self._diff(o, v, path + [k], removed)
+                if sub:
+                    changed[k] = sub
+            elif o is _MISSING or o != v or type(o) is not type(v):
+                changed[k] = v
+        for k in old:
+            if k not in new:
+                removed.append(path + [k])
+        return changed
+
+    def encode(self, stats):
+        state = self._quantise(stats)
+        self.seq += 1
+
+        if (self._state is None or self._force_keyframe
+                or self._since_keyframe >= self.keyframe_every):
+            self._state = state
+            self._since_keyframe = 0
+            self._force_keyframe = False
+            return {"seq": self.seq, "kf": 1, "d": state}
+
+        removed = []
+        changed = self._diff(self._state, state, [], removed)
+        self._state = state
+        self._since_keyframe += 1
+        frame = {"seq": self.seq, "base": self.seq - 1, "d": changed}
+        if removed:
+            frame["rm"] = removed
+        return frame
+
+
+_MISSING = object()
@@ -0,0 +1,47 @@
+import itertools
+import os
+from collections import deque
+
+
+class HistoryBuffer:
+    """
+    Bounded in-memory history of scalar samples indexed by a sequence number.
+
+    Rows are [seq, ts_ms, value, ...] in the order of `fields`. Sequence
+    numbers are contiguous, so the row for any seq still held is found by
+    offset from the oldest one. `epoch` changes on every server start, so a
+    client can tell when the seq it remembers belongs to an older history.
+    """
+
+    def __init__(self, fields, capacity=3600):
+        self.fields = list(fields)
+        self.rows = deque(maxlen=capacity)
+        self.seq = 0
+        self.epoch = os.urandom(4).hex()
+
+    def append(self, ts_ms, snapshot):
+        self.seq += 1
+        self.rows.append([self.seq, ts_ms] + [snapshot.get(f) for f in self.fields])
+        return self.seq
+
+    def since(self, seq, stride=1):
+        """Rows after seq, keeping every `stride`-th one. Returns (rows, truncated)."""
+        if not self.rows or seq >= self.seq:
+            return [], False
+        first = self.rows[0][0]
+        truncated = seq + 1 < first
+        start = max(0, seq + 1 - first)
+        rows = list(itertools.islice(self.rows, start, None))
+        if stride > 1:
+            # Keep the newest row and step back from it
+            rows = rows[::-1][::stride][::-1]
+        return rows, truncated
+
+    def batch(self, seq, stride=1):
+        rows, truncated = self.since(seq, stride)
+        return {
+            "epoch": self.epoch,
+            "fields": ["seq", "ts"] + self.fields,
+            "rows": rows,
+            "truncated": truncated,
+        }
@@ -77,7 +77,13 @@ import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 import socketio
-from .system_monitor import get_system_stats
+from .sampler import StatsSampler, LoopLagMonitor
+from .broadcaster import Broadcaster, GROUPS, DEFAULT_TIER
+from .delivery import TableFeed
+from shared import wire_format
+from .monitors import process_monitor
+from .monitors.process_monitor import ProcessCollector
+from .database import db_manager
 from dotenv import load_dotenv
 import os
 
@@ -94,22 +100,50 @@ sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
 # Import handlers (AFTER sio is created)
 from . import actions_handler
 
+# Full state every KEYFRAME_EVERY frames, per-field deltas in between
+KEYFRAME_EVERY = int(os.getenv("KEYFRAME_EVERY", "12"))
+STATS_PRECISION = int(os.getenv("STATS_PRECISION", "1"))
+
+# Stats are collected off the event loop; loop_lag proves the loop stays free
+sampler = StatsSampler()
+loop_lag = LoopLagMonitor()
+processes = ProcessCollector()
+# process_update goes out per client, in its wire format, one in flight at a time
+process_feed = TableFeed(sio, "process_update", processes.table)
+# History rows are [seq, ts_ms, *METRICS]; the DB stores them without seq.
+# insert_rows() only queues, the writer thread does the SQLite work
+broadcaster = Broadcaster(sio, sampler, keyframe_every=KEYFRAME_EVERY, precision=STATS_PRECISION,
+                          on_history=lambda row: db_manager.insert_rows([row[1:]]))
+client_formats = {}  # sid -> wire format negotiated on connect
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    asyncio.create_task(monitor_loop())
+    db_manager.init_db()
+    sampler.start(asyncio.get_running_loop())
+    asyncio.create_task(loop_lag.run())
+    asyncio.create_task(broadcaster.run())
+    asyncio.create_task(process_loop())
     print("Monitoring loop started...")
     yield
+    sampler.stop()
+    await asyncio.to_thread(db_manager.close)
     print("Server shutting down...")
 
 app = FastAPI(lifespan=lifespan)
 sio_app = socketio.ASGIApp(sio, app)
 
-async def monitor_loop():
+async def process_loop():
+    loop = asyncio.get_running_loop()
+    next_run = loop.time()
     while True:
-        stats = get_system_stats()
-        print("SERVER: emitting stats...", stats)
-        await sio.emit("stats_update", stats)
-        await asyncio.sleep(5)
+        # psutil calls run on a worker thread, never on the loop
+        update = await asyncio.to_thread(processes.collect)
+        if update["changed"] or update["removed"]:
+            await process_feed.publish(update)
+        await process_feed.expire()
+
+        next_run += process_monitor.INTERVAL
+        await asyncio.sleep(max(0.0, next_run - loop.time()))
 
 @sio.event
 async def connect(sid, environ):
@@ -122,13 +156,65 @@ async def connect(sid, environ):
         await sio.disconnect(sid)
         return False
 
-    print(f"✓ Client {sid} authorized")
+    fmt = params.get("format", wire_format.JSON)
+    if fmt not in wire_format.available_formats():
+        print(f"Client {sid} asked for unsupported format {fmt!r}, using JSON")
+        fmt = wire_format.JSON
+    client_formats[sid] = fmt
+    process_feed.add(sid, fmt)
+    # Everything at the default rate until the client subscribes
+    await broadcaster.subscribe(sid, list(GROUPS), DEFAULT_TIER, fmt)
+
+    print(f"✓ Client {sid} authorized ({fmt})")
     return True
 
+@sio.on("subscribe")
+async def handle_subscribe(sid, data):
+    # data: {"groups": ["core", "io"], "tier": "1s", "since": 1234, "epoch": "..."}
+    # since/epoch are optional and ask for the rows missed while disconnected
+    data = data or {}
+    fmt = client_formats.get(sid, wire_format.JSON)
+    return await broadcaster.subscribe(
+        sid, data.get("groups", list(GROUPS)), data.get("tier", DEFAULT_TIER), fmt,
+        since=data.get("since"), epoch=data.get("epoch"),
+    )
+
+@sio.on("resync")
+async def handle_resync(sid, data=None):
+    # A client missed a frame or just joined; its next frame goes out as a keyframe
+    broadcaster.request_keyframe(sid, (data or {}).get("group"))
+
+@sio.on("process_table")
+async def send_process_table(sid, data=None):
+    # Clients ask for the whole table once after connecting, then get only changed rows
+    await process_feed.send_full(sid)
+
 @sio.event
 async def disconnect(sid):
+    client_formats.pop(sid, None)
+    broadcaster.unsubscribe(sid)
+    process_feed.remove(sid)
     print(f"Client disconnected: {sid}")
 
 @app.get("/api/usage")
 async def status():
-    return {"message": "Monitoring active"}
+    return {
+        "message": "Monitoring active",
+        "samples": sampler.samples,
+        "collector_runs": sampler.scheduler.runs,
+        "last_collect_ms": round(sampler.last_collect_ms, 2),
+        "loop_lag": loop_lag.snapshot(),
+        "processes": processes.stats(),
+        "process_feed": process_feed.stats(),
+        "broadcast": broadcaster.stats(),
+        "db": db_manager.writer_stats(),
+    }
+
+@app.get("/api/history")
+async def history(start_ms: int = 0, end_ms: int = None, limit: int = 3600):
+    # Persisted samples; SQLite reads run on a worker thread
+    if end_ms is None:
+        end_ms = int(time.time() * 1000) + 1
+    limit = max(1, min(limit, 86400))
+    rows = await asyncio.to_thread(db_manager.query_range, start_ms, end_ms, limit)
+    return {"fields": ["ts"] + db_manager.COLUMNS, "rows": rows}
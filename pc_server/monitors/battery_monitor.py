@@ -1,8 +1,16 @@
 import psutil
 
+from . import linux_fastpath
+
+INTERVAL = 60.0  # seconds; changes slowly
+
+_fast = linux_fastpath.battery_reader()
+
 def get_battery_usage():
+    if _fast:
+        return _fast.percent()
     usage = psutil.sensors_battery()
     if usage:
         return usage.percent
     else:
-        return None
\ No newline at end of file
+        return None
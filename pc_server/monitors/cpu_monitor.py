@@ -1,5 +1,17 @@
 import psutil
 
+from . import linux_fastpath
+
+INTERVAL = 0.25  # seconds; fast-moving, sampled often
+
+_fast = linux_fastpath.cpu_reader()
+
+# Prime psutil's CPU baseline so the first real call is meaningful.
+psutil.cpu_percent(interval=None)
+
 def get_cpu_usage():
-    usage = psutil.cpu_percent(interval=1)
-    return usage
\ No newline at end of file
+    if _fast:
+        return _fast.percent()
+    # Non-blocking: percentage since the previous call instead of sleeping 1s.
+    usage = psutil.cpu_percent(interval=None)
+    return usage
@@ -0,0 +1,47 @@
+import os
+import psutil
+
+from .rate_engine import CounterRateEngine
+
+INTERVAL = 1.0  # seconds
+
+SYS_BLOCK = "/sys/class/block"
+
+_rates = CounterRateEngine({"read_bytes": "read_bps", "write_bytes": "write_bps"})
+_whole_disk = {}
+
+
+def _is_whole_disk(name):
+    # perdisk=True also lists partitions (sda1), loop/ram/zram devices and
+    # stacked devices (LVM/LUKS dm-*, mdraid md*, whose I/O is also counted
+    # on the disks listed in their slaves/); rates for those would double
+    # count the physical disk
+    known = _whole_disk.get(name)
+    if known is None:
+        if os.path.isdir(SYS_BLOCK):
+            dev = os.path.join(SYS_BLOCK, name)
+            try:
+                stacked = bool(os.listdir(os.path.join(dev, "slaves")))
+            except OSError:
+                stacked = False
+            known = (
+                not name.startswith(("loop", "ram", "zram"))
+                and not os.path.exists(os.path.join(dev, "partition"))
+                and not stacked
+            )
+        else:
+            known = True
+        _whole_disk[name] = known
+    return known
+
+
+def get_disk_io():
+    counters = psutil.disk_io_counters(perdisk=True) or {}
+    disks = {k: v for k, v in counters.items() if _is_whole_disk(k)}
+    per_disk = _rates.update(disks)
+    totals = _rates.totals(per_disk)
+    return {
+        "disk_read_bps": totals["read_bps"],
+        "disk_write_bps": totals["write_bps"],
+        "disk_io": per_disk,
+    }
@@ -0,0 +1,137 @@
+import os
+import sys
+
+# Direct /proc and sysfs readers for Linux. Each reader keeps its file open
+# and re-reads it with preadv() into a preallocated buffer, parsing only the
+# fields we use. Disk usage is not here: psutil.disk_usage() is already a
+# single statvfs() call. Every factory returns None when the fast path is not
+# available so the monitors fall back to psutil.
+#
+# Set MONITOR_BACKEND=psutil to force the psutil path.
+
+ENABLED = sys.platform.startswith("linux") and os.getenv("MONITOR_BACKEND", "auto") != "psutil"
+
+
+class ProcFile:
+    def __init__(self, path, size=4096):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY)
+        self.buf = bytearray(size)
+
+    def read(self):
+        """Re-read the file into self.buf and return the number of valid bytes."""
+        n = os.preadv(self.fd, [self.buf], 0)
+        while n == len(self.buf):
+            # File outgrew the buffer; grow and keep the new size
+            self.buf = bytearray(len(self.buf) * 2)
+            n = os.preadv(self.fd, [self.buf], 0)
+        return n
+
+    def close(self):
+        os.close(self.fd)
+
+
+class CpuReader:
+    """Aggregate CPU busy % from /proc/stat, computed like psutil.cpu_percent()."""
+
+    def __init__(self):
+        self.file = ProcFile("/proc/stat", size=16384)
+        self.last_total, self.last_busy = self._times()
+
+    def _times(self):
+        n = self.file.read()
+        buf = self.file.buf
+        # First line is the aggregate "cpu  user nice system idle iowait ..."
+        fields = [int(x) for x in buf[:buf.index(b"\n", 0, n)].split()[1:]]
+        total = sum(fields)
+        # guest/guest_nice are already counted in user/nice
+        if len(fields) > 8:
+            total -= sum(fields[8:10])
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+        return total, total - idle
+
+    def percent(self):
+        total, busy = self._times()
+        d_total = total - self.last_total
+        d_busy = busy - self.last_busy
+        self.last_total, self.last_busy = total, busy
+        if d_total <= 0:
+            return 0.0
+        return round(min(100.0, max(0.0, d_busy / d_total * 100)), 1)
+
+
+class MemReader:
+    """Used memory % from /proc/meminfo, computed like psutil.virtual_memory().percent."""
+
+    def __init__(self):
+        self.file = ProcFile("/proc/meminfo")
+        n = self.file.read()
+        if self.file.buf.find(b"MemAvailable:", 0, n) < 0:
+            # Pre-3.14 kernels; psutil estimates this field, we do not
+            raise OSError("MemAvailable not reported")
+
+    @staticmethod
+    def _field(buf, n, name):
+        i = buf.index(name, 0, n) + len(name)
+        j = buf.index(b"kB", i, n)
+        return int(buf[i:j])
+
+    def percent(self):
+        n = self.file.read()
+        buf = self.file.buf
+        total = self._field(buf, n, b"MemTotal:")
+        avail = self._field(buf, n, b"MemAvailable:")
+        return round((total - avail) / total * 100, 1)
+
+
+class BatteryReader:
+    """Battery % from /sys/class/power_supply/<BAT>/capacity."""
+
+    ROOT = "/sys/class/power_supply"
+
+    def __init__(self):
+        self.file = None
+        for name in sorted(os.listdir(self.ROOT)):
+            base = os.path.join(self.ROOT, name)
+            try:
+                with open(os.path.join(base, "type")) as f:
+                    if f.read().strip() != "Battery":
+                        continue
+                self.file = ProcFile(os.path.join(base, "capacity"), size=16)
+                break
+            except OSError:
+                continue
+        if self.file is None:
+            raise OSError("no battery in " + self.ROOT)
+
+    def percent(self):
+        n = self.file.read()
+        return float(self.file.buf[:n])
+
+
+def _open(cls):
+    if not ENABLED:
+        return None
+    try:
+        return cls()
+    except (OSError, ValueError) as e:
+        print(f"Fast path {cls.__name__} unavailable, using psutil:", e)
+        return None
+
+
+def cpu_reader():
+    return _open(CpuReader)
+
+
+def mem_reader():
+    return _open(MemReader)
+
+
+def battery_reader():
+    # No battery is the common case on desktops; stay quiet about it
+    if not ENABLED or not os.path.isdir(BatteryReader.ROOT):
+        return None
+    try:
+        return BatteryReader()
+    except OSError:
+        return None
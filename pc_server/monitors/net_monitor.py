@@ -0,0 +1,38 @@
+import re
+
+import psutil
+
+from .rate_engine import CounterRateEngine
+
+INTERVAL = 1.0  # seconds
+
+# Loopback names when psutil has no interface flags (psutil < 5.9.3, and
+# Windows, where flags are always empty): lo, lo0 and the like on Linux and
+# macOS, "Loopback Pseudo-Interface 1" on Windows
+LOOPBACK_NAME = re.compile(r"lo\d*$|Loopback Pseudo-Interface")
+
+_rates = CounterRateEngine({"bytes_recv": "rx_bps", "bytes_sent": "tx_bps"})
+_loopback = {}  # nic -> True if it is a loopback interface
+
+
+def _is_loopback(nic):
+    known = _loopback.get(nic)
+    if known is None:
+        stats = psutil.net_if_stats().get(nic)
+        flags = getattr(stats, "flags", "")
+        known = "loopback" in flags.split(",") or bool(LOOPBACK_NAME.match(nic))
+        _loopback[nic] = known
+    return known
+
+
+def get_net_io():
+    counters = psutil.net_io_counters(pernic=True)
+    # Loopback traffic never leaves the machine
+    counters = {nic: c for nic, c in counters.items() if not _is_loopback(nic)}
+    per_nic = _rates.update(counters)
+    totals = _rates.totals(per_nic)
+    return {
+        "net_rx_bps": totals["rx_bps"],
+        "net_tx_bps": totals["tx_bps"],
+        "net_io": per_nic,
+    }
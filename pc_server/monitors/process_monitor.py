@@ -0,0 +1,162 @@
+import heapq
+import time
+
+import psutil
+
+INTERVAL = 2.0  # seconds
+
+
+class ProcessCollector:
+    """
+    Incremental per-process top-N table.
+
+    psutil.Process objects are cached by pid, so each tick only costs one
+    cpu_times()/memory_info() read per process and CPU % comes from the
+    delta against the previous read. The whole tick counts against
+    budget_ms: listing pids, tracking new ones, the round-robin refresh and
+    building the table. Refreshing stops early enough to leave time for the
+    table, going by what that took last tick, and resumes round-robin on
+    the next tick. cmdline is only read for processes that enter the
+    published table.
+
+    collect() returns just the rows that changed since the previous call;
+    cmd is included once per pid, with its first row or, when the budget
+    ran out before it could be read, a later one.
+    """
+
+    def __init__(self, top_n=10, budget_ms=50.0, clock=time.monotonic):
+        self.top_n = top_n
+        self.budget_ms = budget_ms
+        self.clock = clock
+        self.ncpu = psutil.cpu_count() or 1
+        # pid -> [Process, name, cpu_time, sample_t, cpu_pct, rss]
+        self._procs = {}
+        self._order = []
+        # Set whenever _procs gains or loses a pid; _order is rebuilt from it
+        self._order_dirty = False
+        self._cursor = 0
+        self._cmdlines = {}
+        self._published = {}  # pid -> row as last sent
+        self._cmd_owed = set()  # published pids whose cmd has not been sent
+        self._tail_ms = 0.0  # time building the table took last tick
+        self.last_cost_ms = 0.0
+        self.last_refreshed = 0
+
+    def _track_new(self, pids, now, deadline):
+        for pid in pids:
+            # Leftover new pids are picked up on the next tick
+            if time.perf_counter() >= deadline:
+                return
+            try:
+                p = psutil.Process(pid)
+                with p.oneshot():
+                    t = p.cpu_times()
+                    entry = [p, p.name(), t.user + t.system, now, 0.0, p.memory_info().rss]
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            self._procs[pid] = entry
+            self._order_dirty = True
+
+    def _refresh(self, entry, now):
+        p = entry[0]
+        with p.oneshot():
+            t = p.cpu_times()
+            rss = p.memory_info().rss
+        cpu_time = t.user + t.system
+        dt = now - entry[3]
+        if dt > 0:
+            entry[4] = (cpu_time - entry[2]) / dt * 100 / self.ncpu
+        entry[2], entry[3], entry[5] = cpu_time, now, rss
+
+    def _cmdline(self, pid, entry):
+        cmd = self._cmdlines.get(pid)
+        if cmd is None:
+            try:
+                cmd = " ".join(entry[0].cmdline())[:200]
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                cmd = ""
+            self._cmdlines[pid] = cmd
+        return cmd
+
+    @staticmethod
+    def _row(pid, entry):
+        return {
+            "pid": pid,
+            "name": entry[1],
+            "cpu": round(entry[4], 1),
+            "rss_mb": round(entry[5] / 1048576, 1),
+        }
+
+    def collect(self):
+        started = time.perf_counter()
+        deadline = started + self.budget_ms / 1000
+        # Refreshing stops this much earlier, leaving room for the table
+        refresh_deadline = deadline - self._tail_ms / 1000
+        now = self.clock()
+
+        live = set(psutil.pids())
+        for pid in [pid for pid in self._procs if pid not in live]:
+            del self._procs[pid]
+            self._cmdlines.pop(pid, None)
+            self._order_dirty = True
+        self._track_new([pid for pid in live if pid not in self._procs], now, refresh_deadline)
+
+        if self._order_dirty:
+            self._order = list(self._procs)
+            self._order_dirty = False
+            self._cursor %= max(1, len(self._order))
+
+        # Round-robin refresh within what is left of the time budget
+        refreshed = 0
+        n = len(self._order)
+        while refreshed < n and time.perf_counter() < refresh_deadline:
+            pid = self._order[self._cursor]
+            self._cursor = (self._cursor + 1) % n
+            refreshed += 1
+            entry = self._procs.get(pid)
+            if entry is None:
+                continue
+            try:
+                self._refresh(entry, now)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                del self._procs[pid]
+                self._order_dirty = True
+
+        tail_started = time.perf_counter()
+        items = self._procs.items()
+        top = {pid for pid, _ in heapq.nlargest(self.top_n, items, key=lambda kv: kv[1][4])}
+        top.update(pid for pid, _ in heapq.nlargest(self.top_n, items, key=lambda kv: kv[1][5]))
+
+        changed = []
+        table = {}
+        for pid in top:
+            entry = self._procs[pid]
+            row = self._row(pid, entry)
+            table[pid] = row
+            if pid not in self._published:
+                self._cmd_owed.add(pid)
+            if pid in self._cmd_owed and (pid in self._cmdlines or time.perf_counter() < deadline):
+                # cmdline is a read of its own; past the budget it waits a tick
+                changed.append(dict(row, cmd=self._cmdline(pid, entry)))
+                self._cmd_owed.discard(pid)
+            elif self._published.get(pid) != row:
+                changed.append(row)
+        removed = [pid for pid in self._published if pid not in table]
+        self._cmd_owed.difference_update(removed)
+        self._published = table
+
+        done = time.perf_counter()
+        self._tail_ms = (done - tail_started) * 1000
+        self.last_refreshed = refreshed
+        self.last_cost_ms = (done - started) * 1000
+        return {"changed": changed, "removed": removed}
+
+    def table(self):
+        return [dict(row, cmd=self._cmdlines.get(pid, "")) for pid, row in self._published.items()]
+
+    def stats(self):
+        return {
+            "tracked": len(self._procs),
+            "refreshed": self.last_refreshed,
+            "cost_ms": round(self.last_cost_ms, 2),
+        }
@@ -1,5 +1,13 @@
 import psutil
 
+from . import linux_fastpath
+
+INTERVAL = 1.0  # seconds
+
+_fast = linux_fastpath.mem_reader()
+
 def get_ram_usage():
+    if _fast:
+        return _fast.percent()
     usage = psutil.virtual_memory().percent
-    return usage
\ No newline at end of file
+    return usage
@@ -0,0 +1,63 @@
+import time
+
+
+class CounterRateEngine:
+    """
+    Turns cumulative per-device counters (psutil io counters) into per-second
+    rates using monotonic timestamps.
+
+    Previous values are kept in one list per device and overwritten in place,
+    so a steady-state tick allocates nothing but the output dict. A device
+    seen for the first time only records a baseline; a device that vanished
+    is forgotten. A counter that goes backwards is treated as a wrap when
+    `wrap` is given and the old value was in the top half of its range,
+    otherwise as a reset (the device was re-enumerated) and reports 0 for
+    that tick. psutil already undoes wraps for its own counters by default.
+    """
+
+    def __init__(self, fields, wrap=None, clock=time.monotonic):
+        # fields: {counter attribute: output name}
+        self.attrs = list(fields)
+        self.names = [fields[a] for a in self.attrs]
+        self.wrap = wrap
+        self.clock = clock
+        self._prev = {}
+        self._prev_t = None
+
+    def update(self, counters, now=None):
+        now = self.clock() if now is None else now
+        dt = now - self._prev_t if self._prev_t is not None else 0.0
+        self._prev_t = now
+
+        rates = {}
+        for dev, c in counters.items():
+            prev = self._prev.get(dev)
+            if prev is None:
+                self._prev[dev] = [getattr(c, a) for a in self.attrs]
+                continue
+
+            row = {}
+            for i, attr in enumerate(self.attrs):
+                cur = getattr(c, attr)
+                delta = cur - prev[i]
+                if delta < 0:
+                    if self.wrap and self.wrap // 2 <= prev[i] < self.wrap:
+                        delta += self.wrap
+                    if delta < 0:
+                        delta = 0
+                prev[i] = cur
+                row[self.names[i]] = round(delta / dt, 1) if dt > 0 else 0.0
+            rates[dev] = row
+
+        # Every current device is in _prev now, so extra entries were unplugged
+        if len(self._prev) > len(counters):
+            for dev in [d for d in self._prev if d not in counters]:
+                del self._prev[dev]
+        return rates
+
+    def totals(self, rates):
+        out = dict.fromkeys(self.names, 0.0)
+        for row in rates.values():
+            for name in self.names:
+                out[name] += row[name]
+        return out
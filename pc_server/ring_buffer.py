@@ -0,0 +1,61 @@
+import threading
+
+import numpy as np
+
+
+class MetricRing:
+    """
+    Fixed-size ring of numeric samples (one column per metric).
+
+    The sampler pushes every fast tick; each emitter calls window(key) once
+    per emit to get min/max/mean/last of everything pushed since its own
+    previous emit, so short spikes survive a slow emit rate. Emitters at
+    different rates use different keys.
+    """
+
+    def __init__(self, metrics, capacity=1024):
+        self.metrics = list(metrics)
+        self.capacity = capacity
+        self.data = np.full((capacity, len(self.metrics)), np.nan)
+        self.count = 0  # total samples ever pushed
+        self._marks = {}  # key -> count at that emitter's previous window() call
+        self._row = np.empty(len(self.metrics))
+        self._lock = threading.Lock()
+
+    def push(self, values):
+        row = self._row
+        for i, key in enumerate(self.metrics):
+            v = values.get(key)
+            row[i] = np.nan if v is None else v
+        with self._lock:
+            self.data[self.count % self.capacity] = row
+            self.count += 1
+
+    def window(self, key=None):
+        """Summarise samples pushed since the last call for `key` and start a new window."""
+        with self._lock:
+            n = min(self.count - self._marks.get(key, 0), self.capacity)
+            end = self.count % self.capacity
+            start = (self.count - n) % self.capacity
+            if n == 0:
+                rows = self.data[:0]
+            elif start < end:
+                rows = self.data[start:end].copy()
+            else:
+                rows = np.concatenate((self.data[start:], self.data[:end]))
+            self._marks[key] = self.count
+
+        summary = {}
+        for i, key in enumerate(self.metrics):
+            col = rows[:, i]
+            col = col[~np.isnan(col)]
+            if col.size == 0:
+                summary[key] = None
+                continue
+            summary[key] = {
+                "min": float(col.min()),
+                "max": float(col.max()),
+                "mean": round(float(col.mean()), 3),
+                "last": float(col[-1]),
+            }
+        return summary, int(n)
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+
+from .ring_buffer import MetricRing
+from .system_monitor import CollectorScheduler, METRICS
+
+
+class StatsSampler:
+    """
+    Runs the collector scheduler on a background thread and hands finished
+    snapshots to the asyncio loop, so collection never blocks network I/O.
+    """
+
+    def __init__(self, scheduler=None, metrics=METRICS, ring_capacity=1024):
+        self.scheduler = scheduler or CollectorScheduler()
+        self.ring = MetricRing(metrics, capacity=ring_capacity)
+        self.latest = None
+        self.latest_ts_ms = None  # wall-clock collection time of `latest`
+        self.samples = 0
+        self.last_collect_ms = 0.0
+        self._loop = None
+        self._ready = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, loop):
+        self._loop = loop
+        self._ready = asyncio.Event()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stats-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        self.scheduler.start()
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            ran = self.scheduler.run_due()
+            if ran:
+                ts_ms = int(time.time() * 1000)
+                self.ring.push(self.scheduler.snapshot)
+                self.last_collect_ms = (time.perf_counter() - started) * 1000
+                try:
+                    self._loop.call_soon_threadsafe(self._publish, dict(self.scheduler.snapshot), ts_ms)
+                except RuntimeError:
+                    # Loop already closed (shutdown)
+                    return
+
+            delay = self.scheduler.next_deadline() - self.scheduler.clock()
+            if delay > 0:
+                self._stop.wait(delay)
+
+    def _publish(self, stats, ts_ms):
+        # Runs on the event loop thread
+        self.latest = stats
+        self.latest_ts_ms = ts_ms
+        self.samples += 1
+        self._ready.set()
+
+    async def next_sample(self):
+        await self._ready.wait()
+        self._ready.clear()
+        return self.latest
+
+    def frame(self, key=None):
+        """Latest values plus min/max/mean/last for the window since the previous frame for `key`."""
+        frame = dict(self.latest)
+        frame["window"], frame["window_samples"] = self.ring.window(key)
+        return frame
+
+
+class LoopLagMonitor:
+    """
+    Measures how long the event loop was blocked by scheduling a short
+    sleep and recording how late each wake-up was.
+    """
+
+    def __init__(self, interval=0.1, blocked_after=0.05):
+        self.interval = interval
+        self.blocked_after = blocked_after
+        self.ticks = 0
+        self.blocked_events = 0
+        self.total_blocked_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.last_lag_ms = 0.0
+
+    async def run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - expected)
+
+            self.ticks += 1
+            self.last_lag_ms = lag * 1000
+            self.max_lag_ms = max(self.max_lag_ms, self.last_lag_ms)
+            if lag >= self.blocked_after:
+                self.blocked_events += 1
+                self.total_blocked_ms += lag * 1000
+
+    def snapshot(self):
+        return {
+            "ticks": self.ticks,
+            "blocked_events": self.blocked_events,
+            "total_blocked_ms": round(self.total_blocked_ms, 2),
+            "max_lag_ms": round(self.max_lag_ms, 2),
+            "last_lag_ms": round(self.last_lag_ms, 2),
+        }
@@ -1,13 +1,92 @@
+import heapq
+import time
+
+from .monitors import cpu_monitor, ram_monitor, disk_monitor, battery_monitor, io_monitor, net_monitor
 from .monitors.cpu_monitor import get_cpu_usage
 from .monitors.ram_monitor import get_ram_usage
-from .monitors.disk_monitor import get_disk_usage
+from .monitors.disk_monitor import get_disk_stats
 from .monitors.battery_monitor import get_battery_usage
+from .monitors.io_monitor import get_disk_io
+from .monitors.net_monitor import get_net_io
+
+# (stats key, collector, cadence in seconds declared by the monitor module).
+# A collector may return a dict to publish extra fields next to its key.
+COLLECTORS = [
+    ("cpu", get_cpu_usage, cpu_monitor.INTERVAL),
+    ("memory", get_ram_usage, ram_monitor.INTERVAL),
+    ("disk", get_disk_stats, disk_monitor.INTERVAL),
+    ("battery", get_battery_usage, battery_monitor.INTERVAL),
+    ("disk_read_bps", get_disk_io, io_monitor.INTERVAL),
+    ("net_rx_bps", get_net_io, net_monitor.INTERVAL),
+]
+
+# Scalar fields tracked in the sampler's ring buffer
+METRICS = [
+    "cpu", "memory", "disk", "battery",
+    "disk_read_bps", "disk_write_bps", "net_rx_bps", "net_tx_bps",
+]
+
+def _store(stats, key, value):
+    if isinstance(value, dict):
+        stats.update(value)
+    else:
+        stats[key] = value
 
 def get_system_stats():
-    stats = {
-        "cpu":get_cpu_usage(),
-        "memory":get_ram_usage(),
-        "disk":get_disk_usage(),
-        "battery":get_battery_usage()
-    }
+    stats = {}
+    for key, collect, _ in COLLECTORS:
+        _store(stats, key, collect())
     return stats
+
+
+class CollectorScheduler:
+    """
+    Runs each collector at its own cadence on absolute deadlines.
+
+    Deadlines are computed as start + n * interval rather than by adding
+    to the previous wake-up time, so the schedule never drifts. Collectors
+    that fall due at the same instant are run together and the combined
+    snapshot is updated once.
+    """
+
+    def __init__(self, collectors=COLLECTORS, clock=time.monotonic):
+        self.collectors = collectors
+        self.clock = clock
+        self.snapshot = {key: None for key, _, _ in collectors}
+        self.runs = {key: 0 for key, _, _ in collectors}
+        self._start = None
+        self._ticks = [0] * len(collectors)
+        self._heap = []
+
+    def start(self, now=None):
+        self._start = self.clock() if now is None else now
+        self._ticks = [0] * len(self.collectors)
+        # Everything is due immediately so the first snapshot is complete
+        self._heap = [(self._start, i) for i in range(len(self.collectors))]
+        heapq.heapify(self._heap)
+
+    def next_deadline(self):
+        return self._heap[0][0]
+
+    def run_due(self, now=None):
+        """Run every collector whose deadline has passed. Returns the keys that ran."""
+        if self._start is None:
+            self.start(now)
+        now = self.clock() if now is None else now
+
+        ran = []
+        while self._heap and self._heap[0][0] <= now:
+            _, i = heapq.heappop(self._heap)
+            key, collect, interval = self.collectors[i]
+            try:
+                _store(self.snapshot, key, collect())
+            except Exception as e:
+                print(f"Collector {key} failed:", e)
+            self.runs[key] += 1
+            ran.append(key)
+
+            # Skip whole periods we overslept instead of bursting to catch up
+            behind = int((now - self._start) / interval) + 1
+            self._ticks[i] = max(self._ticks[i] + 1, behind)
+            heapq.heappush(self._heap, (self._start + self._ticks[i] * interval, i))
+        return ran
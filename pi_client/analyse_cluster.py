@@ -1,19 +1,17 @@
-import sqlite3
-import pandas as pd
 import matplotlib.pyplot as plt
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import silhouette_score
 
+from pi_client.query import fetch_range, to_frame
+
 # === Load data from the local BrotherEye database ===
-DB_PATH = "usage_log.db"  # Path to your Pi client database
-conn = sqlite3.connect(DB_PATH)
-df = pd.read_sql_query("SELECT * FROM usage_log", conn)
-conn.close()
+# Run from the repo root:  python -m pi_client.analyse_cluster
+features = ['cpu', 'memory', 'disk', 'battery']
+df = to_frame(*fetch_range(metrics=features), features)
 
 # === Preprocess the data ===
 df = df.dropna()
-features = ['cpu', 'memory', 'disk', 'battery']
 
 scaler = StandardScaler()
 X_scaled = scaler.fit_transform(df[features])
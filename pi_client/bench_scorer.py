@@ -0,0 +1,60 @@
+# bench_scorer.py
+# FastIsolationScorer against the sklearn path the detector used to take
+# (one-row DataFrame -> scaler.transform -> iso.score_samples).
+# Run from the repo root:  python -m pi_client.bench_scorer
+import timeit
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from pi_client.fast_scorer import FastIsolationScorer
+from pi_client.realtime_anomaly import MODEL_PATH, SCALER_PATH
+
+N = 500
+FEATURES = ["cpu", "memory", "disk", "battery"]
+
+
+def main():
+    # Pickles from another sklearn version still load, just noisily
+    warnings.filterwarnings("ignore", category=UserWarning)
+    iso = joblib.load(MODEL_PATH)
+    scaler = joblib.load(SCALER_PATH)
+    fast = FastIsolationScorer.from_model(iso, scaler)
+
+    r = np.random.default_rng(42)
+    X = r.uniform(0, 100, size=(10_000, len(FEATURES)))
+
+    expected = iso.score_samples(scaler.transform(X))
+    batch = fast.score_batch(X)
+    single = np.array([fast.score(x) for x in X[:1000]])
+    print(f"max |diff| batch  {np.abs(batch - expected).max():.3g}")
+    print(f"max |diff| single {np.abs(single - expected[:1000]).max():.3g}")
+    assert np.allclose(batch, expected, rtol=0, atol=1e-12)
+    assert np.allclose(single, expected[:1000], rtol=0, atol=1e-12)
+
+    x = X[0]
+    row = dict(zip(FEATURES, x))
+
+    def sklearn_one():
+        return iso.score_samples(scaler.transform(pd.DataFrame([row])))[0]
+
+    sk_us = timeit.timeit(sklearn_one, number=N) / N * 1e6
+    fast_us = timeit.timeit(lambda: fast.score(x), number=N) / N * 1e6
+    print(f"{'path':<22} {'us/sample':>10}")
+    print(f"{'sklearn, 1 row':<22} {sk_us:>10.1f}")
+    print(f"{'fast, 1 row':<22} {fast_us:>10.1f}   {sk_us / fast_us:.0f}x")
+
+    # sklearn's compiled traversal pulls ahead again on large batches
+    for size in (32, 256, 10_000):
+        B = X[:size]
+        reps = max(5, 2000 // size)
+        sk_b = timeit.timeit(lambda: iso.score_samples(scaler.transform(B)), number=reps) / reps / size * 1e6
+        fast_b = timeit.timeit(lambda: fast.score_batch(B), number=reps) / reps / size * 1e6
+        print(f"{f'sklearn, {size} batch':<22} {sk_b:>10.2f}")
+        print(f"{f'fast, {size} batch':<22} {fast_b:>10.2f}   {sk_b / fast_b:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# bench_wire.py
+# Bytes per frame and encode/decode cost for each stats_update wire format.
+# Run from the repo root:  python -m pi_client.bench_wire
+import random
+import timeit
+
+from shared import wire_format
+
+N = 2000
+
+
+def sample_frame(cores=16, disks=8, nics=4):
+    r = random.Random(42)
+    metrics = ["cpu", "memory", "disk", "battery",
+               "disk_read_bps", "disk_write_bps", "net_rx_bps", "net_tx_bps"]
+    d = {m: round(r.uniform(0, 100), 1) for m in metrics}
+    d["window"] = {
+        m: {k: round(r.uniform(0, 100), 1) for k in ("min", "max", "mean", "last")}
+        for m in metrics
+    }
+    d["window_samples"] = 20
+    d["per_core"] = [round(r.uniform(0, 100), 1) for _ in range(cores)]
+    d["disks"] = {f"/mnt/vol{i}": round(r.uniform(0, 100), 1) for i in range(disks)}
+    d["disk_io"] = {
+        f"sd{chr(97 + i)}": {"read_bps": r.uniform(0, 1e8), "write_bps": r.uniform(0, 1e8)}
+        for i in range(disks)
+    }
+    d["net_io"] = {
+        f"eth{i}": {"rx_bps": r.uniform(0, 1e7), "tx_bps": r.uniform(0, 1e7)}
+        for i in range(nics)
+    }
+    return {"seq": 1, "kf": 1, "d": d}
+
+
+def main():
+    frame = sample_frame()
+    print(f"{'format':<14} {'bytes':>7} {'encode us':>10} {'decode us':>10}")
+    for fmt in wire_format.available_formats():
+        payload = wire_format.encode(frame, fmt)
+        enc = lambda: wire_format.encode(frame, fmt)
+        dec = lambda: wire_format.decode(payload)
+        size = len(payload.encode() if isinstance(payload, str) else payload)
+        assert wire_format.decode(payload) == frame
+        enc_us = timeit.timeit(enc, number=N) / N * 1e6
+        dec_us = timeit.timeit(dec, number=N) / N * 1e6
+        print(f"{fmt:<14} {size:>7} {enc_us:>10.1f} {dec_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
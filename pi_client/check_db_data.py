@@ -16,7 +16,7 @@ if os.path.exists(DB_PATH):
         print(f"Records in usage_log: {count}")
         
         if count > 0:
-            cursor.execute("SELECT * FROM usage_log ORDER BY timestamp DESC LIMIT 5")
+            cursor.execute("SELECT * FROM usage_log ORDER BY ts_ms DESC LIMIT 5")
             recent_data = cursor.fetchall()
             print("Recent records:")
             for record in recent_data:
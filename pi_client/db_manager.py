@@ -1,33 +1,104 @@
 # pi_client/db_manager.py
 import sqlite3
 import os
+import time
+
+from shared.db_writer import DbWriter
 
 # Absolute path to this file’s directory
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "usage_log.db")
+# Rows the writer could not queue wait here instead of being dropped
+SPILL_PATH = DB_PATH + "-spill"
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS usage_log (
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-        cpu REAL,
-        memory REAL,
-        disk REAL,
-        gpu REAL,
-        battery REAL
+# Bumped whenever usage_log changes shape; stored in PRAGMA user_version.
+# Version 2 replaced the text timestamp with an indexed ts_ms column,
+# version 3 added the usage_1m/usage_1h rollups and incremental vacuum.
+SCHEMA_VERSION = 3
+
+# Raw rows and minute rollups older than this are pruned; hourly rollups stay
+RAW_RETENTION_DAYS = float(os.getenv("RAW_RETENTION_DAYS", "30"))
+MINUTE_RETENTION_DAYS = float(os.getenv("MINUTE_RETENTION_DAYS", "365"))
+PRUNE_INTERVAL = 3600.0
+
+# Throughput columns (bytes/s) added after the original schema
+RATE_COLUMNS = ["disk_read", "disk_write", "net_rx", "net_tx"]
+METRIC_COLUMNS = ["cpu", "memory", "disk", "gpu", "battery"] + RATE_COLUMNS
+
+INSERT_SQL = (
+    f"INSERT INTO usage_log (ts_ms, host, {', '.join(METRIC_COLUMNS)}) "
+    f"VALUES (?, ?, {', '.join('?' for _ in METRIC_COLUMNS)})"
+)
+
+_writer = None  # DbWriter, started on first insert
+
+def create_table_sql(name="usage_log"):
+    # ts_ms is UTC epoch milliseconds, stamped by the server at collection time
+    return f"""
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY,
+        ts_ms INTEGER NOT NULL,
+        host TEXT,
+        {', '.join(f'{col} REAL' for col in METRIC_COLUMNS)}
     )
-    """)
-    conn.commit()
-    conn.close()
+    """
+
+def create_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS usage_log_ts_ms ON usage_log (ts_ms)")
 
-def insert_stats(cpu, memory, disk, gpu, battery):
+def init_db():
     conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
-        "INSERT INTO usage_log (cpu, memory, disk, gpu, battery) VALUES (?, ?, ?, ?, ?)",
-        (cpu, memory, disk, gpu, battery)
-    )
-    conn.commit()
+    # WAL is persistent, and lets the analysis scripts read while we write
+    conn.execute("PRAGMA journal_mode=WAL")
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < SCHEMA_VERSION:
+        # Imported here: migrate_db imports this module for the schema
+        from pi_client import migrate_db
+        migrate_db.migrate(conn)
     conn.close()
+
+def _prune(conn):
+    from pi_client import rollup
+    # No-op once done; on a database migrated from v2 this is the one slow
+    # pass, on the writer thread instead of at startup
+    rollup.enable_incremental_vacuum(conn)
+    deleted = rollup.prune(conn, int(RAW_RETENTION_DAYS * 86400000), int(MINUTE_RETENTION_DAYS * 86400000))
+    if deleted:
+        print(f"Pruned {deleted} rows past retention")
+
+def _get_writer():
+    global _writer
+    if _writer is None:
+        # Imported here: rollup imports this module for the column list
+        from pi_client import rollup
+        _writer = DbWriter(DB_PATH, INSERT_SQL, on_batch=rollup.update,
+                           maintenance=_prune, maintenance_interval=PRUNE_INTERVAL,
+                           spill_path=SPILL_PATH)
+    return _writer
+
+def insert_stats(cpu, memory, disk, gpu, battery,
+                 disk_read=None, disk_write=None, net_rx=None, net_tx=None,
+                 ts_ms=None, host=None):
+    # Queued for the writer thread. ts_ms should come from the server's
+    # frame; fall back to our own clock if it did not send one
+    if ts_ms is None:
+        ts_ms = int(time.time() * 1000)
+    _get_writer().put([(ts_ms, host, cpu, memory, disk, gpu, battery,
+                        disk_read, disk_write, net_rx, net_tx)])
+
+def insert_many(rows, host=None):
+    """
+    Queue already-timestamped rows for the writer thread.
+
+    rows: iterable of (ts_ms, cpu, memory, disk, gpu, battery,
+    disk_read, disk_write, net_rx, net_tx).
+    """
+    _get_writer().put([(row[0], host) + tuple(row[1:]) for row in rows])
+
+def writer_stats():
+    return _writer.stats() if _writer is not None else None
+
+def close():
+    """Flush queued rows; call on shutdown."""
+    if _writer is not None:
+        _writer.close()
@@ -0,0 +1,104 @@
+# delta_decoder.py
+
+class DeltaDecoder:
+    """
+    Rebuilds full stats from the server's keyframe/delta frames.
+
+    apply() returns the full state, or None when a frame cannot be applied
+    (no keyframe yet, or a sequence gap). The caller should then ask the
+    server for a keyframe. Frames without "seq" come from older servers,
+    which send the full stats every time; each one becomes the state.
+    """
+
+    def __init__(self):
+        self.state = None
+        self.seq = None
+        self.gaps = 0
+        self.frames = 0
+
+    def apply(self, frame):
+        if "seq" not in frame:
+            # Older servers send the full stats every time
+            self.state = frame
+            self.seq = None
+            self.frames += 1
+            return frame
+
+        if frame.get("kf"):
+            self.state = frame["d"]
+        elif self.state is None or frame.get("base") != self.seq:
+            if self.state is not None:
+                self.gaps += 1
+            # Anything after a gap is meaningless until the next keyframe
+            self.state = None
+            self.seq = None
+            return None
+        else:
+            _merge(self.state, frame["d"])
+            for path in frame.get("rm", []):
+                _remove(self.state, path)
+
+        self.seq = frame["seq"]
+        self.frames += 1
+        return self.state
+
+
+def _merge(dst, src):
+    for k, v in src.items():
+        if isinstance(v, dict) and isinstance(dst.get(k), dict):
+            _merge(dst[k], v)
+        else:
+            dst[k] = v
+
+
+def _remove(state, path):
+    node = state
+    for k in path[:-1]:
+        node = node.get(k)
+        if not isinstance(node, dict):
+            return
+    node.pop(path[-1], None)
+
+
+class TickAssembler:
+    """
+    Groups the frames of one server tick across metric groups.
+
+    The server sends each group of a tick as its own frame, all with the
+    same "t", in no fixed order. Call start(t) before applying a frame and
+    add(group, h) once it applied. on_tick(t, h, groups) fires as soon as
+    every group in `groups` has arrived for t. If a tick is left incomplete
+    (a frame was conflated away or lost), it fires with the groups that
+    did arrive when the next tick starts. The decoders of those groups
+    still hold that tick's state at that point.
+    """
+
+    def __init__(self, groups, on_tick):
+        self.groups = frozenset(groups)
+        self.on_tick = on_tick
+        self.t = None
+        self.h = None
+        self.seen = set()
+
+    def start(self, t):
+        if t != self.t:
+            self._fire()
+            self.t = t
+
+    def add(self, group, h=None):
+        self.seen.add(group)
+        if h is not None:
+            self.h = h
+        if self.seen >= self.groups:
+            self._fire()
+
+    def _fire(self):
+        if self.seen:
+            seen, self.seen = self.seen, set()
+            self.on_tick(self.t, self.h, seen)
+
+    def reset(self):
+        """Forget a partial tick, e.g. after a reconnect."""
+        self.t = None
+        self.h = None
+        self.seen = set()
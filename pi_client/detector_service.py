@@ -0,0 +1,225 @@
+# detector_service.py
+# Runs RealtimeAnomalyDetector in its own Python process so model work
+# never holds the GIL of the process serving the UI and the socket.
+#
+# Samples go to the worker over a pipe. The worker drains whatever has
+# queued up (at most max_batch samples), scores it in one pass and sends
+# the results back, where a reader thread hands each one to on_result().
+# If the worker dies, the reader starts a new one. Smoothing and debounce
+# state start over after a restart.
+#
+# retrain() refits the model in a separate nice-19 process
+# (pi_client/retrain.py). If the new model passes validation, the worker
+# is told to reload the bundle between two batches.
+#
+# The worker is a fresh interpreter (python -m pi_client.detector_service)
+# rather than a multiprocessing child. spawn/forkserver would re-run
+# main.py's top-level code in the child, and fork is unsafe with this
+# many threads about.
+import os
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Connection
+
+from pi_client.retrain import EXIT_REJECTED
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAX_BATCH = 32
+# Control message asking the worker to reload the model bundle
+RELOAD = "reload"
+
+
+class DetectorService:
+    def __init__(self, on_result, max_batch=MAX_BATCH, restart_delay=1.0):
+        """
+        on_result(result) is called on the reader thread with
+        {"ts_ms", "values", "score", "threshold", "anomaly"} per sample;
+        anomaly is None (and score NaN) when the sample could not be scored.
+        """
+        self.on_result = on_result
+        self.max_batch = max_batch
+        self.restart_delay = restart_delay
+        self.sent = 0
+        self.results = 0
+        self.dropped = 0  # samples that could not reach a live worker
+        self.restarts = 0
+        self.last_rtt_ms = 0.0  # submit to result, newest sample of a batch
+        self.last_batch = 0
+        self.retrains = 0
+        self.last_retrain_code = None
+        self._retrain_proc = None
+        self._lock = threading.Lock()
+        # Samples and reload requests come from different threads
+        self._send_lock = threading.Lock()
+        self._closing = False
+        self._start()
+        self._reader = threading.Thread(target=self._read, name="detector-results", daemon=True)
+        self._reader.start()
+
+    def _start(self):
+        to_worker_r, to_worker_w = os.pipe()
+        from_worker_r, from_worker_w = os.pipe()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "pi_client.detector_service",
+             str(to_worker_r), str(from_worker_w), str(self.max_batch)],
+            pass_fds=(to_worker_r, from_worker_w),
+            cwd=REPO_ROOT,
+        )
+        os.close(to_worker_r)
+        os.close(from_worker_w)
+        with self._lock:
+            self._proc = proc
+            self._send = Connection(to_worker_w, readable=False)
+            self._recv = Connection(from_worker_r, writable=False)
+
+    def submit(self, ts_ms, cpu, memory, disk, battery):
+        """Queue one sample for scoring. Blocks only if the pipe is full."""
+        if self._post((time.perf_counter(), ts_ms, (cpu, memory, disk, battery))):
+            self.sent += 1
+        else:
+            # Worker gone; the reader is restarting it
+            self.dropped += 1
+
+    def _post(self, msg):
+        with self._lock:
+            conn = self._send
+        try:
+            with self._send_lock:
+                conn.send(msg)
+            return True
+        except OSError:
+            return False
+
+    def reload(self):
+        """Have the worker swap in the bundle on disk after its current batch."""
+        return self._post(RELOAD)
+
+    def retrain(self):
+        """
+        Start a background retrain unless one is already running. The
+        worker reloads the model if the retrain writes a new bundle.
+        """
+        with self._lock:
+            if self._retrain_proc is not None and self._retrain_proc.poll() is None:
+                return False
+            proc = self._retrain_proc = subprocess.Popen(
+                [sys.executable, "-m", "pi_client.retrain"], cwd=REPO_ROOT)
+        threading.Thread(target=self._await_retrain, args=(proc,), name="detector-retrain", daemon=True).start()
+        return True
+
+    def _await_retrain(self, proc):
+        code = self.last_retrain_code = proc.wait()
+        self.retrains += 1
+        if code == 0:
+            self.reload()
+        elif code != EXIT_REJECTED and not self._closing:
+            print(f"Retrain failed with exit code {code}")
+
+    def _read(self):
+        while True:
+            try:
+                batch = self._recv.recv()
+            except (EOFError, OSError):
+                if self._closing:
+                    return
+                self._restart()
+                continue
+            now = time.perf_counter()
+            self.last_batch = len(batch)
+            self.last_rtt_ms = (now - batch[-1][0]) * 1000
+            for _, ts_ms, values, score, threshold, anomaly in batch:
+                self.results += 1
+                try:
+                    self.on_result({"ts_ms": ts_ms, "values": values, "score": score,
+                                    "threshold": threshold, "anomaly": anomaly})
+                except Exception as e:
+                    print("Anomaly result handler failed:", e)
+
+    def _restart(self):
+        code = self._proc.wait()
+        print(f"Anomaly detector exited with code {code}, restarting in {self.restart_delay}s")
+        self._send.close()
+        self._recv.close()
+        time.sleep(self.restart_delay)
+        self.restarts += 1
+        self._start()
+
+    def close(self, timeout=5.0):
+        self._closing = True
+        if self._retrain_proc is not None and self._retrain_proc.poll() is None:
+            self._retrain_proc.kill()
+        self._post(None)
+        try:
+            self._proc.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+            self._proc.wait()
+        self._reader.join(timeout)
+        self._send.close()
+
+    def stats(self):
+        return {
+            "pid": self._proc.pid,
+            "sent": self.sent,
+            "results": self.results,
+            "dropped": self.dropped,
+            "restarts": self.restarts,
+            "last_batch": self.last_batch,
+            "last_rtt_ms": round(self.last_rtt_ms, 2),
+            "retrains": self.retrains,
+            "last_retrain_code": self.last_retrain_code,
+        }
+
+
+def serve(conn_in, conn_out, max_batch=MAX_BATCH):
+    """Worker loop: score micro-batches until told to stop or the parent goes away."""
+    from pi_client.realtime_anomaly import RealtimeAnomalyDetector
+
+    detector = RealtimeAnomalyDetector()
+    while True:
+        try:
+            msg = conn_in.recv()
+        except EOFError:
+            return
+        batch = []
+        stop = False
+        while True:
+            if msg is None:
+                stop = True
+                break
+            if msg == RELOAD:
+                # Between batches, so a batch never mixes two models
+                if batch:
+                    _score(detector, batch, conn_out)
+                    batch = []
+                try:
+                    detector.reload()
+                except Exception as e:
+                    print("Anomaly model reload failed:", e)
+            else:
+                batch.append(msg)
+            if len(batch) >= max_batch or not conn_in.poll():
+                break
+            msg = conn_in.recv()
+        if batch:
+            _score(detector, batch, conn_out)
+        if stop:
+            return
+
+
+def _score(detector, batch, conn_out):
+    try:
+        results = detector.check_batch([values for _, _, values in batch])
+    except Exception as e:
+        # Keep the worker, and its smoothing and debounce state, alive;
+        # the batch comes back with no verdict
+        print(f"Anomaly scoring of {len(batch)} samples failed:", e)
+        results = [(float("nan"), float("nan"), None)] * len(batch)
+    conn_out.send([msg + result for msg, result in zip(batch, results)])
+
+
+if __name__ == "__main__":
+    fd_in, fd_out, batch_size = (int(a) for a in sys.argv[1:4])
+    serve(Connection(fd_in, writable=False), Connection(fd_out, readable=False), batch_size)
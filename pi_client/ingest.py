@@ -0,0 +1,113 @@
+# ingest.py
+import threading
+import time
+from collections import deque
+
+
+class Stage:
+    """
+    One worker thread draining a bounded queue into `handler(item)`.
+
+    put() never blocks the caller. When the queue is full the oldest
+    waiting item is dropped to make room, so a stage that falls behind
+    works on recent data and the drop shows up in stats(). Items put with
+    keep=True are never dropped; they are let in past maxsize. A stage
+    built with shed=False treats every item that way. Only use it for a
+    handler that never blocks, or its queue can grow without bound.
+    """
+
+    _STOP = object()
+
+    def __init__(self, name, handler, maxsize=256, shed=True):
+        self.name = name
+        self.handler = handler
+        self.maxsize = maxsize
+        self.shed = shed
+        self._items = deque()  # (queued_at, item, keep)
+        self._cond = threading.Condition()
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_latency_ms = 0.0  # enqueue to handler done
+        self.max_latency_ms = 0.0
+        self.last_service_ms = 0.0  # handler alone
+        self._thread = threading.Thread(target=self._run, name=f"ingest-{name}", daemon=True)
+        self._thread.start()
+
+    def put(self, item, keep=False):
+        keep = keep or not self.shed
+        with self._cond:
+            if len(self._items) >= self.maxsize and not keep:
+                # Shed the oldest item that may be shed
+                for i, entry in enumerate(self._items):
+                    if not entry[2]:
+                        del self._items[i]
+                        self.dropped += 1
+                        break
+            self._items.append((time.perf_counter(), item, keep))
+            self._cond.notify_all()
+
+    def close(self, timeout=5.0):
+        """Finish what is queued and stop."""
+        with self._cond:
+            self._items.append((time.perf_counter(), self._STOP, True))
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._items:
+                    self._cond.wait()
+                queued_at, item, _ = self._items.popleft()
+            if item is self._STOP:
+                return
+            started = time.perf_counter()
+            try:
+                self.handler(item)
+            except Exception as e:
+                # One bad sample must not kill the stage
+                self.errors += 1
+                print(f"Ingest stage {self.name} failed:", e)
+            done = time.perf_counter()
+            self.processed += 1
+            self.last_service_ms = (done - started) * 1000
+            self.last_latency_ms = (done - queued_at) * 1000
+            self.max_latency_ms = max(self.max_latency_ms, self.last_latency_ms)
+
+    def stats(self):
+        return {
+            "depth": len(self._items),
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "last_latency_ms": round(self.last_latency_ms, 2),
+            "max_latency_ms": round(self.max_latency_ms, 2),
+            "last_service_ms": round(self.last_service_ms, 2),
+        }
+
+
+class IngestPipeline:
+    """
+    Fans samples out from the Socket.IO callback to independent stages.
+
+    The callback only calls submit(), which enqueues and returns; each
+    stage runs on its own thread, so a slow SD-card commit or model
+    evaluation delays neither the other stages nor receipt of the next
+    frame.
+    """
+
+    def __init__(self, stages):
+        self.stages = {stage.name: stage for stage in stages}
+
+    def submit(self, item, stages=None, keep=False):
+        """Queue item for every stage, or only for the named ones. keep=True items are never shed."""
+        for name in stages or self.stages:
+            self.stages[name].put(item, keep)
+
+    def close(self):
+        for stage in self.stages.values():
+            stage.close()
+
+    def stats(self):
+        return {name: stage.stats() for name, stage in self.stages.items()}
@@ -1,10 +1,9 @@
 # inspect_db.py
-import sqlite3, pandas as pd, os
-DB = os.path.join(os.path.dirname(__file__), "usage_log.db")
+# Run from the repo root:  python -m pi_client.inspect_db
+from pi_client.db_manager import DB_PATH as DB, METRIC_COLUMNS
+from pi_client.query import fetch_range, to_frame
 print("Using DB:", DB)
-conn = sqlite3.connect(DB)
-df = pd.read_sql_query("SELECT * FROM usage_log", conn, parse_dates=["timestamp"])
-conn.close()
+df = to_frame(*fetch_range(metrics=METRIC_COLUMNS), METRIC_COLUMNS).reset_index()
 
 print("Total rows in table:", len(df))
 print("Head:\n", df.head(5))
@@ -16,7 +15,7 @@ if "timestamp" in df.columns:
     print("Min timestamp:", df["timestamp"].min())
     print("Max timestamp:", df["timestamp"].max())
     # show counts per second/minute
-    df_sorted = df.sort_values("timestamp").set_index("timestamp")
+    df_sorted = df.set_index("timestamp")
     print("Counts per 1s:", df_sorted.resample("1S").size().describe())
     print("Counts per 15s:", df_sorted.resample("15S").size().describe())
 else:
@@ -2,9 +2,17 @@ from nicegui import ui, app, run
 import socketio
 import threading, time
 import os
+from urllib.parse import urlparse
 from dotenv import load_dotenv
-from pi_client.db_manager import init_db, insert_stats
-from pi_client.realtime_anomaly import RealtimeAnomalyDetector
+import numpy as np
+from pi_client.db_manager import init_db, insert_stats, insert_many, METRIC_COLUMNS
+from pi_client import db_manager
+from pi_client.query import fetch_range
+from pi_client.ring_store import RingStore
+from pi_client.ingest import IngestPipeline, Stage
+from pi_client.detector_service import DetectorService
+from pi_client.delta_decoder import DeltaDecoder, TickAssembler
+from shared import wire_format
 
 app.storage.general['anomaly_flag'] = False
 
@@ -12,24 +20,57 @@ load_dotenv()
 SECRET_TOKEN = os.getenv("AUTH_TOKEN")
 
 SERVER_URL = "http://192.168.1.15:8000"  
+# Stored with every row so one database can hold several monitored PCs
+SERVER_HOST = urlparse(SERVER_URL).hostname
 REFRESH_INTERVAL = 1                     
+# Metric groups and rate tier requested from the server
+# "window" carries min/max/mean/last of the server's fast samples since
+# the previous frame, so spikes shorter than the tier still reach us
+STATS_GROUPS = ["core", "io", "window"]
+# Groups that make up one stored row; a row is built once all of a tick's
+# frames are in, so every column comes from the same tick
+ROW_GROUPS = [g for g in ("core", "io", "window") if g in STATS_GROUPS]
+STATS_TIER = os.getenv("STATS_TIER", "5s")
+TIER_SECONDS = {"250ms": 0.25, "1s": 1.0, "5s": 5.0}
+# Recent samples kept in memory for windowed stats, loaded from the DB on start
+RING_HOURS = float(os.getenv("RING_HOURS", "6"))
+# Hours between background refits of the anomaly model on recent data
+RETRAIN_HOURS = float(os.getenv("RETRAIN_HOURS", "24"))
+# Binary frames decode much faster than JSON; fall back if msgpack is missing
+WIRE_FORMAT = os.getenv("WIRE_FORMAT", wire_format.MSGPACK_ZLIB)
+if WIRE_FORMAT not in wire_format.available_formats():
+    WIRE_FORMAT = wire_format.JSON
 
 init_db()
 
-detector = RealtimeAnomalyDetector()
+ring = RingStore(METRIC_COLUMNS, int(RING_HOURS * 3600 / TIER_SECONDS.get(STATS_TIER, 1.0)))
 
 sio = socketio.Client()
+decoders = {}  # metric group -> DeltaDecoder for that stream
+# Server history position of the last stored row, sent back on reconnect
+# so the server can replay what we missed
+history = {"epoch": None, "h": None}
 stats_data = {"cpu": 0, "memory": 0, "disk": 0, "gpu": 0, "battery": 0}
+process_table = {}  # pid -> latest row from the server's top-N table
 connection_status = "Disconnected"
 latest_action_message = ""
 latest_anomaly_data = None 
 
+def warm_load_ring():
+    since_ms = int((time.time() - RING_HOURS * 3600) * 1000)
+    ts_ms, values = fetch_range(since_ms, None, METRIC_COLUMNS)
+    ring.extend(ts_ms, values)
+    print(f"Loaded {len(ts_ms)} samples into the ring ({ring.nbytes / 1048576:.1f} MB)")
+
 def connect_socket():
     global connection_status
+    # Before connecting, so live samples land after the stored ones
+    if ring.count == 0:
+        warm_load_ring()
     try:
         print("Connecting with token")
         print(f"🌐 Server URL: {SERVER_URL}")
-        sio.connect(f"{SERVER_URL}?token={SECRET_TOKEN}")
+        sio.connect(f"{SERVER_URL}?token={SECRET_TOKEN}&format={WIRE_FORMAT}")
         connection_status = "Connected"
     except Exception as e:
         print("Socket connection failed:", e)
@@ -41,6 +82,19 @@ def connect_socket():
 def connect():
     global connection_status
     connection_status = "✓ Connected"
+    decoders.clear()
+    ticks.reset()
+    sub = {"groups": STATS_GROUPS, "tier": STATS_TIER}
+    if history["h"] is not None:
+        sub.update(since=history["h"], epoch=history["epoch"])
+    sio.emit("subscribe", sub, callback=on_subscribed)
+    sio.emit("process_table")
+
+def on_subscribed(ack):
+    # A restarted server has a new epoch; seqs from the old one mean nothing
+    if ack and ack.get("epoch") != history["epoch"]:
+        history["epoch"] = ack["epoch"]
+        history["h"] = ack.get("h")
 
 @sio.event
 def disconnect():
@@ -48,21 +102,113 @@ def disconnect():
     connection_status = "✗ Disconnected"
 
 @sio.on("stats_update")
-def on_stats(data):
-    for k in stats_data:
-        stats_data[k] = data.get(k, 0)
-
-    cpu = data.get("cpu", 0)
-    memory = data.get("memory", 0)
-    disk = data.get("disk", 0)
-    gpu = data.get("gpu", 0)
-    battery = data.get("battery", 0)
+def on_stats(payload):
+    frame = wire_format.decode(payload)
+    group = frame.get("g", "core")
+    decoder = decoders.setdefault(group, DeltaDecoder())
+    if "seq" not in frame:
+        # Older server: one full frame per tick, nothing to wait for
+        decoder.apply(frame)
+        submit_row(frame, int(time.time() * 1000))
+        return
 
-    insert_stats(cpu=cpu, memory=memory, disk=disk, gpu=gpu, battery=battery)
+    if group in ROW_GROUPS:
+        # Before apply(), so a tick left incomplete is built from the
+        # decoders' state at that tick
+        ticks.start(frame.get("t"))
+    if decoder.apply(frame) is None:
+        # No keyframe yet or a gap in seq; wait for a fresh keyframe
+        print(f"Stats frame {group}/{frame.get('seq')} out of sequence, requesting keyframe")
+        sio.emit("resync", {"group": group})
+        return
+    if group in ROW_GROUPS:
+        ticks.add(group, frame.get("h"))
 
-    # Check for anomaly
-    if detector.check(cpu, memory, disk, battery):
+def on_tick(t, h, groups):
+    # Only groups that arrived for this tick contribute; the rest are
+    # stored as missing rather than carried over from an older tick
+    if "core" not in groups:
+        return
+    if h is not None:
+        history["h"] = h
+    data = {}
+    for g in groups:
+        data.update(decoders[g].state)
+    submit_row(data, t or int(time.time() * 1000))
+
+def submit_row(data, ts_ms):
+    window = data.get("window") or {}
+
+    def value(key, default=None):
+        # The mean over the tier's window rather than the last fast sample:
+        # a spike between two frames still moves it, and the same value is
+        # stored, scored and later trained on
+        w = window.get(key)
+        return w["mean"] if w else data.get(key, default)
+
+    row = {"cpu": value("cpu", 0), "memory": value("memory", 0), "disk": value("disk", 0),
+           "gpu": data.get("gpu", 0), "battery": value("battery", 0),
+           "disk_read": value("disk_read_bps"), "disk_write": value("disk_write_bps"),
+           "net_rx": value("net_rx_bps"), "net_tx": value("net_tx_bps")}
+    # Everything else happens on the pipeline stages; this thread goes
+    # straight back to reading frames
+    pipeline.submit({"ts_ms": ts_ms, "row": row})
+
+ticks = TickAssembler(ROW_GROUPS, on_tick)
+
+@sio.on("stats_replay")
+def on_stats_replay(payload):
+    batch = wire_format.decode(payload)
+    fields = batch["fields"]
+    col = {name: i for i, name in enumerate(fields)}
+    rows = [
+        (r[col["ts"]], r[col["cpu"]], r[col["memory"]], r[col["disk"]], 0, r[col["battery"]],
+         r[col["disk_read_bps"]], r[col["disk_write_bps"]], r[col["net_rx_bps"]], r[col["net_tx_bps"]])
+        for r in batch["rows"]
+    ]
+    if batch.get("truncated"):
+        print("Server history did not reach back to our last sample; some rows are lost")
+    print(f"Replaying {len(rows)} missed samples")
+    # Replayed rows are only stored, not run through the detector. The
+    # server sends them before live frames resume, so the ring stays in order
+    if rows:
+        # keep: the ring must not lose history to a burst of live frames
+        pipeline.submit({"rows": rows}, stages=("persist", "ui"), keep=True)
+
+# ------------- INGEST STAGES -------------
+# Each runs on its own thread behind a bounded queue (pi_client/ingest.py)
+
+def persist_sample(item):
+    if "rows" in item:
+        insert_many(item["rows"], host=SERVER_HOST)
+    else:
+        insert_stats(**item["row"], ts_ms=item["ts_ms"], host=SERVER_HOST)
+
+def update_ui_state(item):
+    if "rows" in item:
+        arr = np.array(item["rows"], dtype=np.float64)
+        ring.extend(arr[:, 0].astype(np.int64), arr[:, 1:])
+        return
+    row = item["row"]
+    for k in stats_data:
+        stats_data[k] = row.get(k) or 0
+    ring.append(item["ts_ms"], row)
+
+def detect_anomaly(item):
+    # Hands the sample to the detector process and returns; the verdict
+    # comes back on report_anomaly()
+    row = item["row"]
+    detector.submit(item["ts_ms"], row["cpu"], row["memory"], row["disk"], row["battery"])
+
+def report_anomaly(result):
+    if result["anomaly"]:
+        cpu, memory, disk, battery = result["values"]
         print("⚠️ REAL ANOMALY DETECTED!")
+        recent = ring.summary("cpu", since_ms=result["ts_ms"] - 300000)
+        if recent:
+            print(f"   CPU now {cpu}%, last 5 min mean {recent['mean']:.1f}% max {recent['max']:.1f}%")
+        for proc in top_processes(3):
+            print(f"   {proc['name']} (pid {proc['pid']}): CPU={proc['cpu']}% RSS={proc['rss_mb']}MB")
         app.storage.general['anomaly_flag'] = True
 
 
@@ -76,6 +222,33 @@ def on_stats(data):
         #     "timestamp": time.strftime('%H:%M:%S')
         # }
 
+# Model work runs in a separate, auto-restarted process
+detector = DetectorService(report_anomaly)
+
+# Persistence sheds nothing: its handler only hands rows to the DbWriter,
+# which never blocks and spills to disk when its own queue is full.
+# Detection and UI only care about recent samples and shed the oldest live
+# frame when they fall behind
+pipeline = IngestPipeline([
+    Stage("persist", persist_sample, shed=False),
+    Stage("detect", detect_anomaly, maxsize=64),
+    Stage("ui", update_ui_state, maxsize=64),
+])
+
+@sio.on("process_update")
+def on_process_update(payload):
+    data = wire_format.decode(payload)
+    if data.get("full"):
+        process_table.clear()
+    for pid in data.get("removed", []):
+        process_table.pop(pid, None)
+    for row in data.get("changed", []):
+        # Rows after the first omit cmd; keep the one we already have
+        process_table[row["pid"]] = {**process_table.get(row["pid"], {}), **row}
+
+def top_processes(n=3):
+    return sorted(process_table.values(), key=lambda r: r["cpu"], reverse=True)[:n]
+
 @sio.on("action_response")
 def on_action_response(data):
     global latest_action_message
@@ -93,6 +266,27 @@ def delayed_start():
 
 ui.timer(0.1, delayed_start, once=True)
 
+def flush_db():
+    # Drain the stages first so their rows reach the writer queue
+    pipeline.close()
+    print("Ingest stages stopped:", pipeline.stats())
+    detector.close()
+    print("Anomaly detector stopped:", detector.stats())
+    db_manager.close()
+    print("DB writer stopped:", db_manager.writer_stats())
+
+app.on_shutdown(flush_db)
+
+def log_ingest_stats():
+    print("Ingest:", pipeline.stats(), "DB:", db_manager.writer_stats(), "Detector:", detector.stats())
+
+ui.timer(300, log_ingest_stats)
+
+# Low-priority subprocess; the live detector swaps models only if the
+# new one passes validation
+if RETRAIN_HOURS > 0:
+    ui.timer(RETRAIN_HOURS * 3600, detector.retrain)
+
 # ------------- UI COMPONENTS -------------
 from nicegui import app
 import os
@@ -0,0 +1,132 @@
+# migrate_db.py
+# Brings usage_log.db up to db_manager.SCHEMA_VERSION.
+#
+# v2: usage_log goes from the original schema (text timestamp, no key, no
+# index) to id primary key, indexed ts_ms and host. Rows are copied into
+# usage_log_new in rowid ranges, one short transaction per chunk, so
+# memory use is flat and the Pi client can keep writing in between. Old
+# rows keep their rowid as id, which also makes an interrupted run resume
+# where it stopped. The final catch-up and table swap happen in a single
+# transaction.
+#
+# v3: adds the usage_1m/usage_1h rollups, filled from the raw rows in id
+# ranges. Pruned pages are only released once the file is switched to
+# auto_vacuum=INCREMENTAL, which takes a full VACUUM; that is left to the
+# writer's first maintenance pass (rollup.enable_incremental_vacuum) so
+# startup never waits on it.
+#
+# init_db() runs this automatically. To convert a copied database by hand,
+# VACUUM included:
+#   python -m pi_client.migrate_db [path/to/usage_log.db] [host]
+import sqlite3
+import sys
+import time
+
+from pi_client import rollup
+from pi_client.db_manager import (
+    DB_PATH, METRIC_COLUMNS, SCHEMA_VERSION, create_indexes, create_table_sql,
+)
+
+CHUNK_ROWS = 5000
+
+# julianday() parses the CURRENT_TIMESTAMP text; 2440587.5 is the Unix epoch
+TS_MS_SQL = "CAST(round((julianday(timestamp) - 2440587.5) * 86400000) AS INTEGER)"
+
+
+def _columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _copy_range(conn, select_cols, host, lo, hi):
+    cur = conn.execute(
+        f"INSERT INTO usage_log_new (id, ts_ms, host, {', '.join(METRIC_COLUMNS)}) "
+        f"SELECT rowid, {TS_MS_SQL}, ?, {select_cols} FROM usage_log "
+        "WHERE rowid > ? AND rowid <= ? AND julianday(timestamp) IS NOT NULL",
+        (host, lo, hi),
+    )
+    return cur.rowcount
+
+
+def migrate(conn, host=None, chunk_rows=CHUNK_ROWS):
+    """Bring conn's database up to SCHEMA_VERSION. Returns the number of rows copied."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    columns = _columns(conn, "usage_log")
+    if not columns:
+        # Fresh database; the VACUUM in here is instant on an empty file
+        rollup.enable_incremental_vacuum(conn)
+        conn.execute(create_table_sql())
+        create_indexes(conn)
+        rollup.create_tables(conn)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+        return 0
+
+    copied = 0
+    if "ts_ms" not in columns:
+        copied = _to_v2(conn, columns, host, chunk_rows)
+    if version < 3:
+        _to_v3(conn, chunk_rows)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
+    return copied
+
+
+def _to_v2(conn, columns, host, chunk_rows):
+    # Columns the old table never got come across as NULL
+    select_cols = ", ".join(col if col in columns else "NULL" for col in METRIC_COLUMNS)
+    conn.execute(create_table_sql("usage_log_new"))
+    conn.commit()
+    lo = conn.execute("SELECT coalesce(max(id), 0) FROM usage_log_new").fetchone()[0]
+    if lo:
+        print(f"Resuming usage_log migration after row {lo}")
+
+    started = time.perf_counter()
+    copied = 0
+    while True:
+        # Re-read the end every chunk; rows may still be arriving
+        top = conn.execute("SELECT coalesce(max(rowid), 0) FROM usage_log").fetchone()[0]
+        if top - lo <= chunk_rows:
+            break
+        with conn:
+            copied += _copy_range(conn, select_cols, host, lo, lo + chunk_rows)
+        lo += chunk_rows
+
+    # Catch up and swap atomically so no row lands in the old table unseen
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        top = conn.execute("SELECT coalesce(max(rowid), 0) FROM usage_log").fetchone()[0]
+        copied += _copy_range(conn, select_cols, host, lo, top)
+        conn.execute("DROP TABLE usage_log")
+        conn.execute("ALTER TABLE usage_log_new RENAME TO usage_log")
+        create_indexes(conn)
+        conn.execute("PRAGMA user_version = 2")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    print(f"Migrated {copied} usage_log rows to schema v2 "
+          f"in {time.perf_counter() - started:.1f}s")
+    return copied
+
+
+def _to_v3(conn, chunk_rows):
+    started = time.perf_counter()
+    rollup.create_tables(conn)
+    conn.commit()
+    rollup.backfill(conn, chunk_rows)
+    print(f"Built usage rollups in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    host = sys.argv[2] if len(sys.argv) > 2 else None
+    conn = sqlite3.connect(path)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        print(f"{path} is already at schema v{version}")
+    else:
+        migrate(conn, host=host)
+    # Offline, so the one-off full VACUUM can run here
+    rollup.enable_incremental_vacuum(conn)
+    conn.close()
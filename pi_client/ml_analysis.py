@@ -1,12 +1,13 @@
 import pandas as pd
 import matplotlib
 matplotlib.use("Agg")
-import sqlite3
 import matplotlib.pyplot as plt
 from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import KMeans
 from sklearn.metrics import silhouette_score
 import os
+import time
+from pi_client.query import fetch_range, to_frame
 
 plt.style.use("dark_background")
 
@@ -38,26 +39,16 @@ def run_local_ml(days=3):
     """
 
     # -------- Load SQLite Data --------
-    conn = sqlite3.connect("usage_log.db")
-    df = pd.read_sql_query("SELECT * FROM usage_log", conn)
-    conn.close()
+    # 1-minute means straight from the rollup tier; the cost depends on
+    # the window, not on how much raw history is stored
+    metrics = ["cpu", "memory", "disk", "battery"]
+    ts_ms, values = fetch_range(int((time.time() - days * 86400) * 1000), None, metrics, resolution="1m")
 
-    if df.empty or len(df) < 10:
-        return "⚠️ Not enough data to run ML yet.", []
-
-    # -------- Preprocessing --------
-    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
-
-    # Filter for only the last N days
-    from datetime import datetime, timedelta
-    min_date = datetime.now() - timedelta(days=days)
-    df = df[df["timestamp"] >= min_date]
-
-    if df.empty or len(df) < 10:
+    if len(ts_ms) < 10:
         return f"⚠️ Not enough data in the last {days} days to run ML.", []
 
-    # Resample to 1-minute averages for stability
-    df = df.set_index("timestamp").resample("1min").mean(numeric_only=True).dropna()
+    # -------- Preprocessing --------
+    df = to_frame(ts_ms, values, metrics).dropna()
 
     if len(df) < 5:
         return "⚠️ Not enough samples after resampling.", []
@@ -0,0 +1,141 @@
+# model_bundle.py
+# One-file anomaly model: flattened forest, scaler, threshold, feature
+# order and training metadata, laid out so it can be memory-mapped.
+#
+#   magic (8 bytes) | format version (u32) | header length (u32)
+#   | JSON header | padding | arrays, each starting on a 64-byte boundary
+#
+# The header lists every array's dtype, shape and offset, the metadata,
+# and a SHA-256 of everything after it. Loading maps the file read-only
+# and returns numpy views into it, so nothing is unpickled and every
+# process that loads the same bundle shares one copy of its pages.
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"BEMODEL\0"
+FORMAT_VERSION = 1
+ALIGN = 64
+
+_PREFIX = struct.Struct("<8sII")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLE_PATH = os.path.join(BASE_DIR, "anomaly_model.bin")
+
+
+class BundleError(ValueError):
+    pass
+
+
+def _pad(n):
+    return -n % ALIGN
+
+
+def write_bundle(path, arrays, meta):
+    """
+    Write arrays ({name: ndarray}) and meta (JSON-serialisable dict)
+    atomically: readers see the old bundle or the new one, never a mix.
+    """
+    layout = {}
+    offset = 0
+    blobs = []
+    for name, arr in arrays.items():
+        # tobytes() writes C order whatever the layout; ascontiguousarray
+        # would turn 0-d arrays into 1-d ones
+        arr = np.asarray(arr)
+        arr = arr.astype(arr.dtype.newbyteorder("<"), copy=False)
+        layout[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        data = arr.tobytes()
+        blobs.append(data + b"\0" * _pad(len(data)))
+        offset += len(blobs[-1])
+    payload = b"".join(blobs)
+
+    header = json.dumps({
+        "arrays": layout,
+        "meta": meta,
+        "sha256": hashlib.sha256(payload).hexdigest(),
+    }).encode()
+    # Arrays start on an aligned offset from the start of the file
+    header += b" " * _pad(_PREFIX.size + len(header))
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_bundle(path=BUNDLE_PATH, verify=True):
+    """
+    Map a bundle read-only. Returns (arrays, meta); the arrays are views
+    into the mapping and stay valid as long as they are referenced.
+    Raises BundleError if the file is not a bundle this code can read.
+    """
+    with open(path, "rb") as f:
+        # mmap refuses empty files with a ValueError of its own
+        if os.fstat(f.fileno()).st_size < _PREFIX.size:
+            raise BundleError(f"{path}: too short for a model bundle")
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, header_len = _PREFIX.unpack_from(mm, 0)
+    if magic != MAGIC:
+        raise BundleError(f"{path}: not a model bundle")
+    if version != FORMAT_VERSION:
+        raise BundleError(f"{path}: bundle format {version}, expected {FORMAT_VERSION}")
+    try:
+        start = _PREFIX.size + header_len
+        header = json.loads(mm[_PREFIX.size:start])
+
+        buf = memoryview(mm)[start:]
+        if verify and hashlib.sha256(buf).hexdigest() != header["sha256"]:
+            raise BundleError(f"{path}: checksum mismatch")
+
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            arr = np.frombuffer(buf, dtype=dtype, count=count, offset=spec["offset"])
+            arrays[name] = arr.reshape(spec["shape"])
+    except BundleError:
+        raise
+    except (ValueError, KeyError, TypeError) as e:
+        # Truncated or corrupt header or arrays (json errors are ValueErrors)
+        raise BundleError(f"{path}: damaged model bundle ({e})") from e
+    return arrays, header["meta"]
+
+
+def build_bundle(path, iso, scaler, threshold, features, **meta):
+    """Flatten a fitted model and write it with its threshold and feature order."""
+    import sklearn
+    from pi_client.fast_scorer import flatten
+
+    arrays = flatten(iso, scaler)
+    meta = {
+        "features": list(features),
+        "threshold": float(threshold),
+        "n_estimators": len(iso.estimators_),
+        "max_samples": int(iso.max_samples_),
+        "sklearn": sklearn.__version__,
+        **meta,
+    }
+    write_bundle(path, arrays, meta)
+    return meta
+
+
+if __name__ == "__main__":
+    # Convert the pickles from an older train_model.py run:
+    #   python -m pi_client.model_bundle
+    import joblib
+    from pi_client.realtime_anomaly import MODEL_PATH, SCALER_PATH, THRESH_PATH
+
+    meta = build_bundle(
+        BUNDLE_PATH, joblib.load(MODEL_PATH), joblib.load(SCALER_PATH), joblib.load(THRESH_PATH),
+        ["cpu", "memory", "disk", "battery"], source="converted from pickles",
+    )
+    print(f"Wrote {BUNDLE_PATH} ({os.path.getsize(BUNDLE_PATH)} bytes):", meta)
@@ -0,0 +1,123 @@
+# query.py
+# Time-range reads of usage_log and its rollups into numpy arrays.
+#
+# The range filter (and, for rollup tiers, the averaging) runs in SQLite
+# against the ts_ms index or the rollup primary key, so the cost of a read
+# depends on the window rather than on how much history is stored. Rows
+# are streamed with fetchmany() into arrays sized by a COUNT taken in the
+# same read transaction; no pandas object columns are built on the way.
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+
+from pi_client import rollup
+from pi_client.db_manager import DB_PATH
+
+# resolution -> rollup table, None for raw rows
+RESOLUTIONS = {"raw": None, "1m": "usage_1m", "1h": "usage_1h"}
+DEFAULT_METRICS = ("cpu", "memory", "disk", "battery")
+CHUNK_ROWS = 4096
+
+_MAX_MS = 1 << 62
+
+
+def _to_ms(t, default):
+    if t is None:
+        return default
+    if isinstance(t, datetime):
+        # Naive datetimes are local time, like datetime.now()
+        return int(t.timestamp() * 1000)
+    return int(t)
+
+
+def fetch_range(start=None, end=None, metrics=DEFAULT_METRICS, resolution="raw",
+                path=None, chunk_rows=CHUNK_ROWS):
+    """
+    Samples with start <= ts < end, oldest first.
+
+    start/end are epoch milliseconds or datetimes; None leaves that side
+    open. resolution is "raw" or a rollup tier ("1m", "1h"), which returns
+    one mean per bucket with all hosts combined.
+
+    Returns (ts_ms, values): an int64 array of length n and a float64
+    array of shape (n, len(metrics)) with NaN where a value is missing.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"unknown resolution {resolution!r}, expected one of {list(RESOLUTIONS)}")
+    metrics = list(metrics)
+    params = (_to_ms(start, 0), _to_ms(end, _MAX_MS))
+    table = RESOLUTIONS[resolution]
+    if table is None:
+        count_sql = "SELECT count(*) FROM usage_log WHERE ts_ms >= ? AND ts_ms < ?"
+        select_sql = (f"SELECT ts_ms, {', '.join(metrics)} FROM usage_log "
+                      "WHERE ts_ms >= ? AND ts_ms < ? ORDER BY ts_ms")
+    else:
+        count_sql = f"SELECT count(DISTINCT bucket_ms) FROM {table} WHERE bucket_ms >= ? AND bucket_ms < ?"
+        select_sql = rollup.means_sql(table, metrics)
+
+    conn = sqlite3.connect(f"file:{path or DB_PATH}?mode=ro", uri=True)
+    try:
+        # One read transaction, so the count matches what the select returns
+        # even while the writer keeps committing
+        conn.execute("BEGIN")
+        n = conn.execute(count_sql, params).fetchone()[0]
+        ts = np.empty(n, dtype=np.int64)
+        values = np.empty((n, len(metrics)), dtype=np.float64)
+        cur = conn.execute(select_sql, params)
+        i = 0
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                break
+            # dtype=float turns NULLs into NaN
+            chunk = np.array(rows, dtype=np.float64)
+            ts[i:i + len(rows)] = chunk[:, 0]
+            values[i:i + len(rows)] = chunk[:, 1:]
+            i += len(rows)
+        conn.rollback()
+    finally:
+        conn.close()
+    return ts[:i], values[:i]
+
+
+def range_stats(start=None, end=None, path=None):
+    """(rows, first ts_ms, last ts_ms) of raw samples in [start, end), from the ts_ms index alone."""
+    params = (_to_ms(start, 0), _to_ms(end, _MAX_MS))
+    conn = sqlite3.connect(f"file:{path or DB_PATH}?mode=ro", uri=True)
+    try:
+        return conn.execute(
+            "SELECT count(*), min(ts_ms), max(ts_ms) FROM usage_log WHERE ts_ms >= ? AND ts_ms < ?", params
+        ).fetchone()
+    finally:
+        conn.close()
+
+
+def iter_range(start=None, end=None, metrics=DEFAULT_METRICS, path=None, chunk_rows=CHUNK_ROWS):
+    """
+    Raw samples with start <= ts < end as (ts_ms, values) chunks of at most
+    chunk_rows rows, oldest first, for reads too large to hold at once.
+    Same arrays as fetch_range(), one chunk at a time.
+    """
+    metrics = list(metrics)
+    params = (_to_ms(start, 0), _to_ms(end, _MAX_MS))
+    conn = sqlite3.connect(f"file:{path or DB_PATH}?mode=ro", uri=True)
+    try:
+        cur = conn.execute(
+            f"SELECT ts_ms, {', '.join(metrics)} FROM usage_log "
+            "WHERE ts_ms >= ? AND ts_ms < ? ORDER BY ts_ms", params
+        )
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                break
+            chunk = np.array(rows, dtype=np.float64)
+            yield chunk[:, 0].astype(np.int64), chunk[:, 1:]
+    finally:
+        conn.close()
+
+
+def to_frame(ts, values, metrics=DEFAULT_METRICS):
+    """DataFrame of float columns indexed by UTC timestamp, for the pandas-based analyses."""
+    import pandas as pd
+    return pd.DataFrame(values, columns=list(metrics), index=pd.to_datetime(ts, unit="ms").rename("timestamp"))
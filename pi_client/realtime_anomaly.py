@@ -1,14 +1,23 @@
-import pandas as pd
-import joblib
-import numpy as np
 from .smoothing import EWMASmoother
 from .debouncer import AnomalyDebouncer
+from .fast_scorer import FastIsolationScorer
+from .sliding_quantile import SlidingQuantile
+from .model_bundle import BUNDLE_PATH, BundleError, load_bundle
 import os
+import threading
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(BASE_DIR, "iso_model.pkl")
 SCALER_PATH = os.path.join(BASE_DIR, "scaler.pkl")
 THRESH_PATH = os.path.join(BASE_DIR, "threshold.pkl")
+# Hours of scores the drift threshold looks back over. One sample is
+# scored per stats frame, so the window is sized from the tier main.py
+# subscribes at (STATS_TIER, 5 s by default), not from the server's rate.
+DRIFT_HOURS = float(os.environ.get("DRIFT_HOURS", "6"))
+SAMPLE_SECONDS = {"250ms": 0.25, "1s": 1.0, "5s": 5.0}.get(os.environ.get("STATS_TIER", "5s"), 1.0)
+DRIFT_WINDOW = int(os.environ.get("DRIFT_WINDOW_SAMPLES", DRIFT_HOURS * 3600 / SAMPLE_SECONDS))
+# Order check() passes values to the model in
+FEATURES = ["cpu", "memory", "disk", "battery"]
 
 class RealtimeAnomalyDetector:
     def reset(self):
@@ -19,11 +28,13 @@ class RealtimeAnomalyDetector:
         self.score_history.clear()
         self.debouncer.history.clear()
 
-    def __init__(self):
-        # Load trained components
-        self.iso = joblib.load(MODEL_PATH)
-        self.scaler = joblib.load(SCALER_PATH)
-        self.threshold = joblib.load(THRESH_PATH)
+    def __init__(self, bundle_path=BUNDLE_PATH):
+        # Trained components load on a background thread; the first check()
+        # waits for them
+        # (scorer, threshold, bundle metadata), replaced as one by reload()
+        self.model = None
+        self._loaded = threading.Event()
+        threading.Thread(target=self._load, args=(bundle_path,), name="model-load", daemon=True).start()
 
         # EWMAs
         self.cpu_s = EWMASmoother(alpha=0.4)
@@ -34,41 +45,110 @@ class RealtimeAnomalyDetector:
         # Debouncer (2/3 rule)
         self.debouncer = AnomalyDebouncer(window=3, required=2)
 
-        # Keep last ~300 scores for optional dynamic thresholding
-        self.score_history = []
-        self.history_limit = 300  # ~5 minutes at 1 second interval
+        # Recent scores for optional dynamic thresholding, O(log n) per
+        # sample however long the window
+        self.score_history = SlidingQuantile(DRIFT_WINDOW)
+
+    @staticmethod
+    def _read_bundle(bundle_path):
+        arrays, meta = load_bundle(bundle_path)
+        if meta.get("features") != FEATURES:
+            raise BundleError(f"{bundle_path}: features {meta.get('features')}, expected {FEATURES}")
+        # Same scores as scaler + iso.score_samples, straight off the mapped file
+        return FastIsolationScorer(arrays), meta["threshold"], meta
+
+    def _load(self, bundle_path):
+        try:
+            try:
+                self.model = self._read_bundle(bundle_path)
+                return
+            except (OSError, BundleError) as e:
+                print("Model bundle unavailable, loading pickles:", e)
+            # Models trained before bundles existed
+            import joblib
+            scorer = FastIsolationScorer.from_model(joblib.load(MODEL_PATH), joblib.load(SCALER_PATH))
+            self.model = (scorer, joblib.load(THRESH_PATH), {})
+        except Exception as e:
+            print("Anomaly model failed to load:", e)
+        finally:
+            self._loaded.set()
+
+    def reload(self, bundle_path=BUNDLE_PATH):
+        """
+        Swap in a newly written bundle between two samples. Smoothing and
+        debounce state carry over; the drift window restarts because the
+        old model's scores are not comparable. Keeps the current model and
+        returns False if the bundle cannot be read.
+        """
+        try:
+            model = self._read_bundle(bundle_path)
+        except (OSError, BundleError) as e:
+            print("Model reload failed, keeping current model:", e)
+            return False
+        self.model = model
+        self.score_history.clear()
+        self._loaded.set()
+        print("Anomaly model reloaded:", {k: model[2].get(k) for k in ("trained_at_ms", "train_rows", "threshold")})
+        return True
+
+    def ready(self, timeout=None):
+        """Wait for the model; False if it could not be loaded."""
+        return self._loaded.wait(timeout) and self.model is not None
+
+    def _smooth(self, cpu, memory, disk, battery):
+        """
+        Smoothed values in training column order. A missing reading (None
+        or NaN) holds the last smoothed value; None if a metric has never
+        had one, since the sample cannot be scored then.
+        """
+        smoothers = (self.cpu_s, self.mem_s, self.disk_s, self.batt_s)
+        values = (cpu, memory, disk, battery)
+        if any(_missing(v) and s.last is None for v, s in zip(values, smoothers)):
+            return None
+        return [s.last if _missing(v) else s.update(v) for v, s in zip(values, smoothers)]
 
     def check(self, cpu, memory, disk, battery):
-        # Smooth input values
-        cpu_s = self.cpu_s.update(cpu)
-        mem_s = self.mem_s.update(memory)
-        disk_s = self.disk_s.update(disk)
-        batt_s = self.batt_s.update(battery)
-
-        df = pd.DataFrame([{
-            "cpu": cpu_s,
-            "memory": mem_s,
-            "disk": disk_s,
-            "battery": batt_s
-        }])
-
-        X_scaled = self.scaler.transform(df)
-
+        x = self._smooth(cpu, memory, disk, battery)
+        if x is None or not self.ready():
+            return False
+        scorer, threshold, _ = self.model
         # IF score (lower => more anomalous)
-        anomaly_score = self.iso.score_samples(X_scaled)[0]
-
+        anomaly_score = scorer.score(x)
+        return self._decide(anomaly_score, threshold)[1]
+
+    def check_batch(self, samples):
+        """
+        samples: [(cpu, memory, disk, battery), ...] in arrival order.
+        Scores them in one pass; returns [(score, threshold, final), ...],
+        with (nan, nan, None) for a sample that could not be scored.
+        """
+        X = [self._smooth(*s) for s in samples]
+        if not self.ready():
+            return [(float("nan"), float("nan"), False)] * len(X)
+        scorer, threshold, _ = self.model
+        ok = [x for x in X if x is not None]
+        scores = iter(scorer.score_batch(ok) if ok else [])
+        results = []
+        for x in X:
+            if x is None:
+                results.append((float("nan"), float("nan"), None))
+            else:
+                score = next(scores)
+                results.append((float(score),) + self._decide(score, threshold))
+        return results
+
+    def _decide(self, anomaly_score, threshold):
+        """Threshold and debounce one score, in order; returns (threshold, final)."""
         # Store score history for drift adaptation
-        self.score_history.append(anomaly_score)
-        if len(self.score_history) > self.history_limit:
-            self.score_history.pop(0)
+        self.score_history.add(anomaly_score)
 
         # Use trained threshold as primary cutoff
-        dynamic_threshold = self.threshold
+        dynamic_threshold = threshold
 
         # Optional: adaptive threshold if system drifts significantly
-        if len(self.score_history) > 50:
+        if self.score_history.count > 50:
             # Look at lower extreme (3rd percentile of recent scores)
-            drift_low = np.percentile(self.score_history, 3)
+            drift_low = self.score_history.quantile(0.03)
             # Choose the SAFER one (less sensitive)
             dynamic_threshold = min(dynamic_threshold, drift_low)
 
@@ -88,4 +168,8 @@ class RealtimeAnomalyDetector:
         if final:
             print("🔴 DEBOUNCED ANOMALY TRIGGERED!")
 
-        return final
+        return float(dynamic_threshold), bool(final)
+
+
+def _missing(v):
+    return v is None or v != v
@@ -0,0 +1,96 @@
+# retrain.py
+# Refit the anomaly model on a rolling window of usage_log and replace
+# the bundle only if the new model behaves sensibly.
+#
+# Meant to run as its own low-priority process (DetectorService.retrain()
+# starts it):  python -m pi_client.retrain
+# Exit code 0 means a new bundle was written, 2 that it was rejected.
+import os
+import sys
+import time
+
+import numpy as np
+
+from pi_client.model_bundle import BUNDLE_PATH, BundleError, build_bundle, load_bundle
+from pi_client.query import fetch_range
+
+FEATURES = ["cpu", "memory", "disk", "battery"]
+WINDOW_HOURS = float(os.environ.get("RETRAIN_WINDOW_HOURS", "72"))
+MIN_ROWS = 1000
+# Newest share of the window held out to compare old and new models on
+HOLDOUT = 0.2
+PERCENTILE = 1.0
+# A new model may flag at most this share of the holdout, unless the old
+# one already flags more
+MAX_ANOMALY_RATE = 0.05
+
+EXIT_REJECTED = 2
+
+
+def smooth(values, alpha=0.4):
+    """Fill gaps, then the same per-column EWMA the live detector applies."""
+    import pandas as pd
+    df = pd.DataFrame(values).ffill().bfill()
+    return df.ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+
+def anomaly_rate(scorer, threshold, X, chunk_rows=4096):
+    # score_batch keeps a (rows, trees) node array; chunk to bound memory
+    flagged = sum(int(np.count_nonzero(scorer.score_batch(X[i:i + chunk_rows]) < threshold))
+                  for i in range(0, len(X), chunk_rows))
+    return flagged / len(X)
+
+
+def retrain(window_hours=WINDOW_HOURS, path=None, bundle_path=BUNDLE_PATH):
+    """Returns True if a new bundle was written."""
+    from sklearn.ensemble import IsolationForest
+    from sklearn.preprocessing import StandardScaler
+    from pi_client.fast_scorer import FastIsolationScorer
+
+    now_ms = int(time.time() * 1000)
+    ts_ms, values = fetch_range(now_ms - int(window_hours * 3600 * 1000), None, FEATURES, path=path)
+    if len(ts_ms) < MIN_ROWS:
+        print(f"Retrain skipped: {len(ts_ms)} rows in the last {window_hours}h, need {MIN_ROWS}")
+        return False
+
+    X = smooth(values)
+    X = X[~np.isnan(X).any(axis=1)]
+    split = int(len(X) * (1 - HOLDOUT))
+    fit, holdout = X[:split], X[split:]
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(fit)
+    iso = IsolationForest(contamination=0.01, n_estimators=200, random_state=42)
+    iso.fit(X_scaled)
+    threshold = float(np.percentile(iso.score_samples(X_scaled), PERCENTILE))
+
+    new_rate = anomaly_rate(FastIsolationScorer.from_model(iso, scaler), threshold, holdout)
+    try:
+        arrays, meta = load_bundle(bundle_path)
+        old_rate = anomaly_rate(FastIsolationScorer(arrays), meta["threshold"], holdout)
+    except (OSError, BundleError):
+        old_rate = None
+    print(f"Retrain on {len(fit)} rows: holdout anomaly rate new={new_rate:.4f} "
+          f"old={'n/a' if old_rate is None else f'{old_rate:.4f}'}")
+
+    if new_rate > max(MAX_ANOMALY_RATE, old_rate or 0.0):
+        print("Retrained model rejected: flags too much of the holdout")
+        return False
+
+    build_bundle(
+        bundle_path, iso, scaler, threshold, FEATURES,
+        trained_at_ms=now_ms,
+        data_from_ms=int(ts_ms[0]), data_to_ms=int(ts_ms[-1]),
+        raw_rows=len(ts_ms), train_rows=len(fit),
+        percentile=PERCENTILE, contamination=iso.contamination,
+        holdout_rate=new_rate, previous_holdout_rate=old_rate,
+        source="retrain",
+    )
+    print("Saved retrained model bundle:", bundle_path)
+    return True
+
+
+if __name__ == "__main__":
+    # Stay out of the way of the UI and ingest on a small board
+    os.nice(19)
+    sys.exit(0 if retrain() else EXIT_REJECTED)
@@ -0,0 +1,92 @@
+# ring_store.py
+import threading
+
+import numpy as np
+
+
+class RingStore:
+    """
+    Fixed-size columnar ring of recent samples: an int64 ts_ms column plus
+    one float32 column per metric.
+
+    Every sample is written twice, at i and i + capacity, so the newest k
+    samples are always one contiguous slice and window() returns numpy
+    views instead of copies. A view stays valid for capacity - k further
+    appends; copy it to keep it longer. Memory is allocated once:
+    2 * capacity * (8 + 4 * len(metrics)) bytes.
+    """
+
+    def __init__(self, metrics, capacity):
+        self.metrics = list(metrics)
+        self.capacity = capacity
+        self.index = {m: i for i, m in enumerate(self.metrics)}
+        self._ts = np.zeros(2 * capacity, dtype=np.int64)
+        self._cols = np.full((len(self.metrics), 2 * capacity), np.nan, dtype=np.float32)
+        self._head = 0  # next slot, in [0, capacity)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return self._ts.nbytes + self._cols.nbytes
+
+    def append(self, ts_ms, values):
+        """values: {metric: value}; metrics not given are stored as NaN."""
+        with self._lock:
+            i = self._head
+            j = i + self.capacity
+            self._ts[i] = self._ts[j] = ts_ms
+            for m, k in self.index.items():
+                v = values.get(m)
+                self._cols[k, i] = self._cols[k, j] = np.nan if v is None else v
+            self._head = (i + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+    def extend(self, ts_ms, values):
+        """
+        Bulk append, oldest first. ts_ms has shape (n,), values shape
+        (n, len(metrics)) in self.metrics order, e.g. from query.fetch_range.
+        """
+        n = len(ts_ms)
+        if n > self.capacity:
+            ts_ms, values, n = ts_ms[-self.capacity:], values[-self.capacity:], self.capacity
+        with self._lock:
+            # Slots this batch lands in, wrapping at capacity
+            slots = (self._head + np.arange(n)) % self.capacity
+            for base in (0, self.capacity):
+                self._ts[slots + base] = ts_ms
+                self._cols[:, slots + base] = values.T
+            self._head = (self._head + n) % self.capacity
+            self.count = min(self.count + n, self.capacity)
+
+    def window(self, n=None, since_ms=None):
+        """
+        Views of the newest samples: (ts_ms of shape (k,), columns of shape
+        (len(metrics), k)), oldest first. n limits the count, since_ms keeps
+        samples with ts_ms >= since_ms.
+        """
+        with self._lock:
+            k = self.count if n is None else min(n, self.count)
+            end = self._head + self.capacity
+            ts = self._ts[end - k:end]
+            cols = self._cols[:, end - k:end]
+        if since_ms is not None:
+            # Samples arrive in time order, so the window is sorted
+            start = int(np.searchsorted(ts, since_ms, side="left"))
+            ts, cols = ts[start:], cols[:, start:]
+        return ts, cols
+
+    def column(self, metric, n=None, since_ms=None):
+        return self.window(n, since_ms)[1][self.index[metric]]
+
+    def summary(self, metric, since_ms=None):
+        """min/max/mean of one metric over the window, None if it has no values."""
+        col = self.column(metric, since_ms=since_ms)
+        if not len(col) or np.isnan(col).all():
+            return None
+        return {
+            "min": float(np.nanmin(col)),
+            "max": float(np.nanmax(col)),
+            "mean": float(np.nanmean(col)),
+            "n": int(np.count_nonzero(~np.isnan(col))),
+        }
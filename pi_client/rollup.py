@@ -0,0 +1,162 @@
+# rollup.py
+# Per-minute and per-hour rollups of usage_log, kept up to date as the
+# writer commits each batch, plus retention pruning of the raw table.
+#
+# Each rollup row holds count/sum/min/max/sum of squares per metric for one
+# (bucket, host), so means and standard deviations of any span can be
+# combined exactly from the rows that cover it. Analyses read these tables
+# instead of resampling the raw log.
+import time
+
+from pi_client.db_manager import METRIC_COLUMNS
+
+# Rollup table -> bucket width in ms
+TIERS = {"usage_1m": 60_000, "usage_1h": 3_600_000}
+STATS = ["n", "sum", "min", "max", "sq"]
+
+PRUNE_CHUNK_ROWS = 5000
+# Pages handed back to the filesystem per maintenance pass
+VACUUM_PAGES = 4096
+
+
+def create_tables(conn):
+    cols = ", ".join(
+        f"{m}_{s} {'INTEGER NOT NULL DEFAULT 0' if s == 'n' else 'REAL'}"
+        for m in METRIC_COLUMNS for s in STATS
+    )
+    for table in TIERS:
+        # host is '' rather than NULL so the primary key can match it
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                bucket_ms INTEGER NOT NULL,
+                host TEXT NOT NULL DEFAULT '',
+                {cols},
+                PRIMARY KEY (bucket_ms, host)
+            )
+        """)
+
+
+def _upsert_sql(table):
+    names = [f"{m}_{s}" for m in METRIC_COLUMNS for s in STATS]
+    merge = []
+    for m in METRIC_COLUMNS:
+        merge.append(f"{m}_n = {m}_n + excluded.{m}_n")
+        for s in ("sum", "sq"):
+            merge.append(f"{m}_{s} = coalesce({m}_{s}, 0) + coalesce(excluded.{m}_{s}, 0)")
+        # Scalar min()/max() return NULL if either side is NULL
+        for s in ("min", "max"):
+            merge.append(
+                f"{m}_{s} = {s}(coalesce({m}_{s}, excluded.{m}_{s}), coalesce(excluded.{m}_{s}, {m}_{s}))"
+            )
+    return (
+        f"INSERT INTO {table} (bucket_ms, host, {', '.join(names)}) "
+        f"VALUES (?, ?, {', '.join('?' for _ in names)}) "
+        f"ON CONFLICT (bucket_ms, host) DO UPDATE SET {', '.join(merge)}"
+    )
+
+
+_UPSERT = {table: _upsert_sql(table) for table in TIERS}
+
+
+def _aggregate(rows, width):
+    """rows of (ts_ms, host, *METRIC_COLUMNS) -> {(bucket, host): [n, sum, min, max, sq] * metrics}"""
+    buckets = {}
+    k = len(STATS)
+    for row in rows:
+        key = (row[0] // width * width, row[1] or "")
+        acc = buckets.get(key)
+        if acc is None:
+            acc = buckets[key] = [0, None, None, None, None] * len(METRIC_COLUMNS)
+        for i, v in enumerate(row[2:]):
+            if v is None:
+                continue
+            j = i * k
+            if acc[j] == 0:
+                acc[j:j + k] = [1, v, v, v, v * v]
+            else:
+                acc[j] += 1
+                acc[j + 1] += v
+                acc[j + 2] = min(acc[j + 2], v)
+                acc[j + 3] = max(acc[j + 3], v)
+                acc[j + 4] += v * v
+    return buckets
+
+
+def update(conn, rows):
+    """Fold a batch of raw rows into every tier. Runs inside the caller's transaction."""
+    for table, width in TIERS.items():
+        buckets = _aggregate(rows, width)
+        conn.executemany(_UPSERT[table], [key + tuple(acc) for key, acc in buckets.items()])
+
+
+def backfill(conn, chunk_rows=PRUNE_CHUNK_ROWS):
+    """Rebuild the rollups from usage_log, one id range per transaction."""
+    cols = ", ".join(METRIC_COLUMNS)
+    top = conn.execute("SELECT coalesce(max(id), 0) FROM usage_log").fetchone()[0]
+    lo = 0
+    while lo < top:
+        with conn:
+            rows = conn.execute(
+                f"SELECT ts_ms, host, {cols} FROM usage_log WHERE id > ? AND id <= ?",
+                (lo, lo + chunk_rows),
+            ).fetchall()
+            update(conn, rows)
+        lo += chunk_rows
+
+
+def prune(conn, raw_keep_ms, minute_keep_ms, now_ms=None):
+    """
+    Delete raw rows older than raw_keep_ms and minute rollups older than
+    minute_keep_ms, in short transactions, then return freed pages to the
+    filesystem. Hourly rollups are kept forever.
+    """
+    if now_ms is None:
+        now_ms = int(time.time() * 1000)
+    deleted = 0
+    while True:
+        with conn:
+            n = conn.execute(
+                "DELETE FROM usage_log WHERE id IN "
+                "(SELECT id FROM usage_log WHERE ts_ms < ? ORDER BY ts_ms LIMIT ?)",
+                (now_ms - raw_keep_ms, PRUNE_CHUNK_ROWS),
+            ).rowcount
+        deleted += n
+        if n < PRUNE_CHUNK_ROWS:
+            break
+    with conn:
+        deleted += conn.execute(
+            "DELETE FROM usage_1m WHERE bucket_ms < ?", (now_ms - minute_keep_ms,)
+        ).rowcount
+    # Only does anything with auto_vacuum=INCREMENTAL. Each step of this
+    # pragma frees one page and execute() steps once; executescript() runs
+    # it to the end
+    conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_PAGES})")
+    return deleted
+
+
+def enable_incremental_vacuum(conn):
+    """
+    Switch the file to auto_vacuum=INCREMENTAL so prune() can hand pages
+    back. Only a full VACUUM applies the switch. That takes minutes on a
+    large database, so it runs once from the writer's maintenance pass
+    (or migrate_db's command line), never during startup.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return False
+    started = time.perf_counter()
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    print(f"Enabled incremental vacuum in {time.perf_counter() - started:.1f}s")
+    return True
+
+
+def means_sql(table, metrics):
+    """
+    SELECT for per-bucket means of `metrics` from a rollup tier, all hosts
+    combined, with ts_ms >= ? AND ts_ms < ? as parameters.
+    """
+    cols = ", ".join(f"total({m}_sum) / nullif(sum({m}_n), 0) AS {m}" for m in metrics)
+    return (
+        f"SELECT bucket_ms AS ts_ms, {cols} FROM {table} "
+        "WHERE bucket_ms >= ? AND bucket_ms < ? GROUP BY bucket_ms ORDER BY bucket_ms"
+    )
@@ -0,0 +1,83 @@
+# sliding_quantile.py
+from array import array
+
+
+class SlidingQuantile:
+    """
+    Quantiles of the last `window` values in [lo, hi], to within one bin.
+
+    Values are bucketed into `bins` equal bins counted in a Fenwick tree,
+    and a fixed ring of bin numbers remembers which count to take back when
+    a value leaves the window. add() and quantile() are O(log bins)
+    whatever the window length. Memory is 2 bytes per window slot plus one
+    int per bin. Values outside [lo, hi] are clamped into the end bins.
+    """
+
+    def __init__(self, window, lo=-1.0, hi=0.0, bins=4096):
+        if bins > 0xFFFF:
+            raise ValueError("bins must fit in 16 bits")
+        self.window = window
+        self.lo = lo
+        self.hi = hi
+        self.bins = bins
+        self.width = (hi - lo) / bins
+        self._tree = [0] * (bins + 1)  # 1-based Fenwick tree of bin counts
+        self._ring = array("H", bytes(2 * window))
+        self._head = 0
+        self.count = 0
+        self._top = 1 << (bins.bit_length() - 1)
+
+    def _bin(self, x):
+        b = int((x - self.lo) / self.width)
+        return 0 if b < 0 else self.bins - 1 if b >= self.bins else b
+
+    def _update(self, b, delta):
+        i = b + 1
+        tree = self._tree
+        while i <= self.bins:
+            tree[i] += delta
+            i += i & -i
+
+    def add(self, x):
+        b = self._bin(x)
+        if self.count == self.window:
+            self._update(self._ring[self._head], -1)
+        else:
+            self.count += 1
+        self._ring[self._head] = b
+        self._head = (self._head + 1) % self.window
+        self._update(b, 1)
+
+    def _kth(self, k):
+        """Midpoint of the bin holding the k-th smallest value (0-based)."""
+        # Fenwick descent: largest prefix of bins holding <= k values
+        pos = 0
+        step = self._top
+        tree = self._tree
+        while step:
+            nxt = pos + step
+            if nxt <= self.bins and tree[nxt] <= k:
+                pos = nxt
+                k -= tree[nxt]
+            step >>= 1
+        return self.lo + (pos + 0.5) * self.width
+
+    def quantile(self, q):
+        """
+        Value at quantile q in [0, 1], None while empty. Interpolates between
+        neighbouring ranks like np.percentile's default method.
+        """
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        k = int(rank)
+        lower = self._kth(k)
+        frac = rank - k
+        if not frac:
+            return lower
+        return lower + frac * (self._kth(k + 1) - lower)
+
+    def clear(self):
+        self._tree = [0] * (self.bins + 1)
+        self._head = 0
+        self.count = 0
@@ -0,0 +1,173 @@
+# train_loader.py
+# Training rows for train_model.py from one streaming pass over usage_log.
+#
+# Chunks from query.iter_range() go through forward-fill, then either 1 s
+# resampling (dense data) or the realtime EWMA (sparse data), each of which
+# carries its state from one chunk to the next, and land in a fixed-size
+# reservoir sample. Peak memory is the reservoir plus one chunk, however
+# much history the database holds.
+import numpy as np
+from scipy.signal import lfilter
+
+from pi_client.query import iter_range, range_stats
+
+# Rows per second at or above which data is resampled to 1 s
+DENSE_ROWS_PER_S = 0.3
+# Longer gaps are left empty instead of interpolated; a straight line over
+# hours of downtime is not data
+MAX_FILL_S = 60
+MAX_ROWS = 200_000
+CHUNK_ROWS = 16_384
+
+
+class _ForwardFill:
+    def __init__(self, n_cols):
+        self.last = np.full(n_cols, np.nan)
+
+    def __call__(self, values):
+        n = len(values)
+        # Row of the latest non-NaN value at or above each cell, -1 for none
+        idx = np.where(np.isnan(values), -1, np.arange(n)[:, None])
+        np.maximum.accumulate(idx, axis=0, out=idx)
+        filled = np.where(idx >= 0, values[np.maximum(idx, 0), np.arange(values.shape[1])], self.last)
+        self.last = filled[-1]
+        return filled
+
+
+class _Resampler:
+    """
+    Per-second means of time-ordered rows, with gaps of up to max_fill_s
+    seconds interpolated linearly. The last second seen is held back until
+    the next chunk shows whether it has more rows, and the last mean until
+    the next one is known; flush() emits both.
+    """
+
+    def __init__(self, max_fill_s=MAX_FILL_S):
+        self.max_fill_s = max_fill_s
+        self.pending = None  # (second, sum, count) of the open second
+        self.last = None  # (second, mean) not yet emitted
+
+    def __call__(self, ts_ms, values):
+        sec = ts_ms // 1000
+        starts = np.flatnonzero(np.r_[True, sec[1:] != sec[:-1]])
+        secs = sec[starts]
+        sums = np.add.reduceat(values, starts, axis=0)
+        counts = np.diff(np.r_[starts, len(sec)]).astype(np.float64)
+        if self.pending is not None:
+            p_sec, p_sum, p_count = self.pending
+            if secs[0] == p_sec:
+                sums[0] += p_sum
+                counts[0] += p_count
+            else:
+                secs = np.r_[p_sec, secs]
+                sums = np.vstack([p_sum, sums])
+                counts = np.r_[p_count, counts]
+        self.pending = (secs[-1], sums[-1], counts[-1])
+        return self._fill(secs[:-1], sums[:-1] / counts[:-1, None])
+
+    def flush(self):
+        out = []
+        if self.pending is not None:
+            p_sec, p_sum, p_count = self.pending
+            self.pending = None
+            out.append(self._fill(np.r_[p_sec], (p_sum / p_count)[None, :]))
+        if self.last is not None:
+            out.append(self.last[1][None, :])
+            self.last = None
+        return np.vstack(out) if out else None
+
+    def _fill(self, secs, means):
+        """Emit each mean plus the interpolated seconds after it, keeping the newest back."""
+        if self.last is not None:
+            secs = np.r_[self.last[0], secs]
+            means = np.vstack([self.last[1], means])
+        if not len(secs):
+            return means[:0]
+        self.last = (secs[-1], means[-1])
+        gaps = np.diff(secs)
+        reps = np.where(gaps - 1 <= self.max_fill_s, gaps, 1)
+        seg = np.repeat(np.arange(len(gaps)), reps)
+        offset = np.arange(len(seg)) - np.repeat(np.cumsum(reps) - reps, reps)
+        frac = (offset / gaps[seg])[:, None]
+        return means[seg] + frac * (means[seg + 1] - means[seg])
+
+
+class _Ewma:
+    """y[i] = alpha * x[i] + (1 - alpha) * y[i - 1] per column, started at the first row."""
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.last = None
+
+    def __call__(self, values):
+        if self.last is None:
+            self.last = values[0]
+        zi = ((1 - self.alpha) * self.last)[None, :]
+        out, _ = lfilter([self.alpha], [1.0, self.alpha - 1.0], values, axis=0, zi=zi)
+        self.last = out[-1]
+        return out
+
+
+class Reservoir:
+    """Uniform sample of at most k rows from a stream (Algorithm R, a chunk at a time)."""
+
+    def __init__(self, k, n_cols, seed=42):
+        self.k = k
+        self.rows = np.empty((k, n_cols))
+        self.seen = 0
+        self.rng = np.random.default_rng(seed)
+
+    def add(self, rows):
+        n = len(rows)
+        take = min(max(self.k - self.seen, 0), n)
+        self.rows[self.seen:self.seen + take] = rows[:take]
+        if take < n:
+            # Row number i replaces a random slot with probability k / (i + 1);
+            # on repeated slots numpy keeps the later row, as the loop would
+            i = self.seen + np.arange(take, n)
+            j = (self.rng.random(n - take) * (i + 1)).astype(np.int64)
+            hit = j < self.k
+            self.rows[j[hit]] = rows[take:][hit]
+        self.seen += n
+
+    def sample(self):
+        return self.rows[:min(self.seen, self.k)]
+
+
+def load_training_data(path=None, metrics=("cpu", "memory", "disk", "battery"),
+                       start=None, end=None, max_rows=MAX_ROWS, alpha=0.4, chunk_rows=CHUNK_ROWS):
+    """
+    Returns (X, info): at most max_rows processed rows of shape
+    (n, len(metrics)), and a dict describing the pass.
+    """
+    metrics = list(metrics)
+    raw_rows, first_ms, last_ms = range_stats(start, end, path)
+    info = {"raw_rows": raw_rows, "first_ms": first_ms, "last_ms": last_ms, "resampled": False, "rows": 0}
+    if not raw_rows:
+        return np.empty((0, len(metrics))), info
+
+    duration_s = (last_ms - first_ms) / 1000 or 1
+    info["density"] = raw_rows / duration_s
+    info["resampled"] = raw_rows > 2 and info["density"] >= DENSE_ROWS_PER_S
+
+    ffill = _ForwardFill(len(metrics))
+    resample = _Resampler() if info["resampled"] else None
+    ewma = None if info["resampled"] else _Ewma(alpha)
+    reservoir = Reservoir(max_rows, len(metrics))
+
+    for ts_ms, values in iter_range(start, end, metrics, path, chunk_rows):
+        values = ffill(values)
+        # Only rows before a column's first value are still NaN
+        ok = ~np.isnan(values).any(axis=1)
+        ts_ms, values = ts_ms[ok], values[ok]
+        if not len(values):
+            continue
+        out = resample(ts_ms, values) if resample else ewma(values)
+        info["rows"] += len(out)
+        reservoir.add(out)
+    if resample:
+        tail = resample.flush()
+        if tail is not None:
+            info["rows"] += len(tail)
+            reservoir.add(tail)
+    return reservoir.sample(), info
@@ -0,0 +1,195 @@
+# shared/db_writer.py. Used by both pc_server and pi_client.
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+
+class DbWriter:
+    """
+    Single SQLite writer thread fed by a bounded queue.
+
+    Callers hand over lists of rows for one prepared statement and return
+    immediately. The writer owns the only connection, drains whatever has
+    queued up and commits it as one executemany() transaction once
+    `batch_size` rows are waiting or `flush_interval` seconds have passed
+    since the first uncommitted row. With WAL and synchronous=NORMAL a
+    commit is an append to the WAL file with no fsync; the WAL is synced at
+    checkpoints. A power cut can lose the last commits but never corrupts
+    the database.
+
+    put() never blocks. When the queue is full, new rows are dropped and
+    counted, unless a `spill_path` is given. In that case they are appended
+    to that file as JSON lines, and the writer commits them once it has
+    caught up with the queue, or on close(). A spill file left by a crash
+    is committed on the next start; rows of a batch that was being
+    replayed at the time may then be stored twice. Spilled rows land after
+    rows queued later, so derived tables must not depend on insertion
+    order.
+
+    on_batch(conn, rows) runs inside each commit's transaction, for
+    derived tables that must stay in step with the rows. maintenance(conn)
+    runs on the writer thread every `maintenance_interval` seconds, between
+    commits.
+    """
+
+    _STOP = object()
+
+    def __init__(self, path, sql, batch_size=200, flush_interval=1.0, maxsize=10000,
+                 on_batch=None, maintenance=None, maintenance_interval=3600.0,
+                 spill_path=None):
+        self.path = path
+        self.spill_path = spill_path
+        self.sql = sql
+        self.on_batch = on_batch
+        self.maintenance = maintenance
+        self.maintenance_interval = maintenance_interval
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.rows_written = 0
+        self.commits = 0
+        self.dropped = 0
+        self.spilled = 0
+        self._spill_lock = threading.Lock()
+        self._replay = None  # open .replay file while spilled rows go back in
+        self.last_commit_ms = 0.0
+        self.max_commit_ms = 0.0
+        self.last_maintenance_ms = 0.0
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, rows):
+        try:
+            self.queue.put_nowait(rows)
+        except queue.Full:
+            if self.spill_path is None:
+                self.dropped += len(rows)
+                return
+            # An append without fsync only touches the page cache
+            with self._spill_lock, open(self.spill_path, "a") as f:
+                f.writelines(json.dumps(row) + "\n" for row in rows)
+            self.spilled += len(rows)
+
+    def close(self, timeout=10.0):
+        """Flush everything queued so far and stop the thread."""
+        if not self._thread.is_alive():
+            return
+        # Blocking put: the stop marker must not be dropped on a full queue
+        self.queue.put(self._STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        pending = []
+        first_at = None
+        stopping = False
+        # First pass soon after start, then every maintenance_interval
+        maintain_at = time.monotonic() + min(60.0, self.maintenance_interval)
+        replaying = self._replay_spill(conn)
+        while not stopping:
+            timeout = 0.0 if replaying else None
+            if pending:
+                timeout = max(0.0, first_at + self.flush_interval - time.monotonic())
+            if self.maintenance is not None:
+                wait = max(0.0, maintain_at - time.monotonic())
+                timeout = wait if timeout is None else min(timeout, wait)
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            # Take everything already queued without waiting again
+            while item is not None:
+                if item is self._STOP:
+                    stopping = True
+                    break
+                if not pending:
+                    first_at = time.monotonic()
+                pending.extend(item)
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    item = None
+
+            if pending and (stopping or len(pending) >= self.batch_size
+                            or time.monotonic() - first_at >= self.flush_interval):
+                self._commit(conn, pending)
+                pending = []
+
+            # Spilled rows go back in a batch at a time, only while the
+            # queue is idle, and all of them before stopping
+            replaying = False
+            if not pending and self.queue.empty():
+                replaying = self._replay_spill(conn)
+                while stopping and replaying:
+                    replaying = self._replay_spill(conn)
+
+            if self.maintenance is not None and not stopping and time.monotonic() >= maintain_at:
+                self._maintain(conn)
+                maintain_at = time.monotonic() + self.maintenance_interval
+        conn.close()
+
+    def _replay_spill(self, conn):
+        """Commit one batch of spilled rows. Returns True while there are more."""
+        if self._replay is None:
+            if self.spill_path is None:
+                return False
+            # Moved aside first so put() can keep appending to a fresh file.
+            # A .replay file already there is left over from a crash
+            replay = self.spill_path + ".replay"
+            with self._spill_lock:
+                if not os.path.exists(replay):
+                    if not os.path.exists(self.spill_path):
+                        return False
+                    os.replace(self.spill_path, replay)
+            self._replay = open(replay)
+        rows = [tuple(json.loads(line)) for _, line in zip(range(self.batch_size), self._replay)]
+        if rows:
+            self._commit(conn, rows)
+            return True
+        self._replay.close()
+        os.remove(self._replay.name)
+        self._replay = None
+        # Rows may have spilled again meanwhile
+        return os.path.exists(self.spill_path)
+
+    def _commit(self, conn, rows):
+        started = time.perf_counter()
+        try:
+            with conn:
+                conn.executemany(self.sql, rows)
+                if self.on_batch is not None:
+                    self.on_batch(conn, rows)
+        except sqlite3.Error as e:
+            print(f"DB write of {len(rows)} rows failed:", e)
+            self.dropped += len(rows)
+            return
+        self.last_commit_ms = (time.perf_counter() - started) * 1000
+        self.max_commit_ms = max(self.max_commit_ms, self.last_commit_ms)
+        self.rows_written += len(rows)
+        self.commits += 1
+
+    def _maintain(self, conn):
+        started = time.perf_counter()
+        try:
+            self.maintenance(conn)
+        except sqlite3.Error as e:
+            print("DB maintenance failed:", e)
+        self.last_maintenance_ms = (time.perf_counter() - started) * 1000
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "rows_written": self.rows_written,
+            "commits": self.commits,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "last_commit_ms": round(self.last_commit_ms, 2),
+            "max_commit_ms": round(self.max_commit_ms, 2),
+            "last_maintenance_ms": round(self.last_maintenance_ms, 2),
+        }
@@ -0,0 +1,56 @@
+# Binary payload format for stats_update, used by both pc_server and pi_client.
+#
+# Clients pick a format with ?format=<name> on the connect URL; JSON stays
+# the default so older clients keep working. JSON payloads are sent as one
+# pre-serialised text string, so a frame going to many clients is only
+# serialised once; clients json.loads() it, as decode() does. Binary
+# payloads are one flag byte followed by the msgpack body, zlib-compressed
+# when that pays off.
+import json
+import zlib
+
+try:
+    import msgpack
+except ImportError:  # binary formats are optional
+    msgpack = None
+
+JSON = "json"
+MSGPACK = "msgpack"
+MSGPACK_ZLIB = "msgpack+zlib"
+
+FLAG_MSGPACK = 0x01
+FLAG_ZLIB = 0x02
+
+# Frames smaller than this rarely shrink under zlib
+COMPRESS_MIN = 256
+
+
+def available_formats():
+    if msgpack is None:
+        return [JSON]
+    return [JSON, MSGPACK, MSGPACK_ZLIB]
+
+
+def encode(frame, fmt):
+    if fmt == JSON:
+        # A dict would be serialised again by python-socketio on every emit
+        return json.dumps(frame, separators=(",", ":"))
+    body = msgpack.packb(frame, use_bin_type=True)
+    flags = FLAG_MSGPACK
+    if fmt == MSGPACK_ZLIB and len(body) >= COMPRESS_MIN:
+        body = zlib.compress(body, 1)
+        flags |= FLAG_ZLIB
+    return bytes((flags,)) + body
+
+
+def decode(payload):
+    if isinstance(payload, dict):
+        return payload
+    if isinstance(payload, str):
+        return json.loads(payload)
+    flags = payload[0]
+    body = memoryview(payload)[1:]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+    # strict_map_key=False: per-pid maps use integer keys
+    return msgpack.unpackb(body, raw=False, strict_map_key=False)
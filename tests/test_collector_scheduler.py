@@ -0,0 +1,81 @@
+import pytest
+
+from pc_server.system_monitor import CollectorScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _scheduler(calls):
+    def collector(key):
+        def collect():
+            calls.append(key)
+            return calls.count(key)
+        return collect
+
+    collectors = [
+        ("slow", collector("slow"), 5.0),
+        ("fast", collector("fast"), 0.25),
+        ("mid", collector("mid"), 1.0),
+    ]
+    return CollectorScheduler(collectors, clock=FakeClock())
+
+
+def test_everything_runs_on_the_first_tick():
+    calls = []
+    sched = _scheduler(calls)
+    assert sorted(sched.run_due()) == ["fast", "mid", "slow"]
+    assert sched.snapshot == {"slow": 1, "fast": 1, "mid": 1}
+    assert sched.next_deadline() == pytest.approx(100.25)
+
+
+def test_deadlines_run_in_order():
+    calls = []
+    sched = _scheduler(calls)
+    sched.start(now=0.0)
+    sched.run_due(now=0.0)
+
+    t = 0.0
+    while t < 10.0:
+        t = sched.next_deadline()
+        ran = sched.run_due(now=t)
+        # Nothing runs ahead of its deadline, nothing due is left behind
+        assert ran
+        assert sched.next_deadline() > t
+    assert sched.runs == {"fast": 41, "mid": 11, "slow": 3}
+
+
+def test_deadlines_are_absolute():
+    calls = []
+    sched = _scheduler(calls)
+    sched.start(now=0.0)
+    sched.run_due(now=0.0)
+    # Waking late does not push later deadlines back
+    assert sched.run_due(now=1.1) == ["fast", "mid"]
+    assert sched.next_deadline() == pytest.approx(1.25)
+
+
+def test_oversleep_skips_missed_periods():
+    calls = []
+    sched = _scheduler(calls)
+    sched.start(now=0.0)
+    sched.run_due(now=0.0)
+    assert sorted(sched.run_due(now=12.6)) == ["fast", "mid", "slow"]
+    assert sched.runs == {"slow": 2, "fast": 2, "mid": 2}
+    assert sched.next_deadline() == pytest.approx(12.75)
+
+
+def test_failing_collector_keeps_schedule():
+    def boom():
+        raise RuntimeError("no sensor")
+
+    sched = CollectorScheduler([("x", boom, 1.0)], clock=FakeClock())
+    sched.start(now=0.0)
+    assert sched.run_due(now=0.0) == ["x"]
+    assert sched.snapshot == {"x": None}
+    assert sched.next_deadline() == 1.0
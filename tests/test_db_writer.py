@@ -0,0 +1,90 @@
+import os
+import sqlite3
+import threading
+import time
+
+from shared.db_writer import DbWriter
+
+SQL = "INSERT INTO t (ts, v) VALUES (?, ?)"
+
+
+def _db(tmp_path):
+    path = str(tmp_path / "w.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (ts INTEGER, v REAL)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT ts, v FROM t ORDER BY ts").fetchall()
+    finally:
+        conn.close()
+
+
+def test_batches_are_committed_after_flush_interval(tmp_path):
+    path = _db(tmp_path)
+    writer = DbWriter(path, SQL, batch_size=1000, flush_interval=0.05)
+    for i in range(10):
+        writer.put([(i, i * 0.5)])
+    time.sleep(0.3)
+    assert len(_rows(path)) == 10
+    assert writer.commits == 1
+    writer.close()
+
+
+def test_close_flushes_everything_queued(tmp_path):
+    path = _db(tmp_path)
+    writer = DbWriter(path, SQL, batch_size=10**6, flush_interval=60.0)
+    writer.put([(i, 1.0) for i in range(500)])
+    writer.put([(500, None)])
+    writer.close()
+    assert len(_rows(path)) == 501
+    assert writer.stats()["rows_written"] == 501
+    # A second close is harmless
+    writer.close()
+
+
+def test_full_queue_drops_without_spill_path(tmp_path):
+    path = _db(tmp_path)
+    gate = threading.Event()
+    writer = DbWriter(path, SQL, maxsize=2, on_batch=lambda conn, rows: gate.wait())
+    for i in range(20):
+        writer.put([(i, 0.0)])
+    gate.set()
+    writer.close()
+    assert writer.dropped > 0
+    assert len(_rows(path)) == 20 - writer.dropped
+
+
+def test_full_queue_spills_and_nothing_is_lost(tmp_path):
+    path = _db(tmp_path)
+    spill = str(tmp_path / "w.db-spill")
+    gate = threading.Event()
+    writer = DbWriter(path, SQL, batch_size=7, maxsize=2, spill_path=spill,
+                      on_batch=lambda conn, rows: gate.wait())
+    started = time.perf_counter()
+    for i in range(200):
+        writer.put([(i, i / 3)])
+    # A stalled writer never holds up put()
+    assert time.perf_counter() - started < 0.5
+    assert writer.spilled > 0
+    gate.set()
+    writer.close()
+    assert writer.dropped == 0
+    assert _rows(path) == [(i, i / 3) for i in range(200)]
+    assert not os.path.exists(spill)
+    assert not os.path.exists(spill + ".replay")
+
+
+def test_spill_left_by_a_crash_is_committed_on_start(tmp_path):
+    path = _db(tmp_path)
+    spill = str(tmp_path / "w.db-spill")
+    with open(spill, "w") as f:
+        f.write("[1, 2.5]\n[2, null]\n")
+    writer = DbWriter(path, SQL, spill_path=spill)
+    writer.close()
+    assert _rows(path) == [(1, 2.5), (2, None)]
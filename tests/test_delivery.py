@@ -0,0 +1,155 @@
+import asyncio
+
+from pc_server.delta_codec import DeltaEncoder
+from pc_server.delivery import ClientOutbox, StreamFrame, TableFeed
+from shared import wire_format
+
+
+class FakeSio:
+    def __init__(self):
+        self.sent = []  # (event, payload, sid, callback)
+
+    async def emit(self, event, payload, to=None, callback=None):
+        self.sent.append((event, payload, to, callback))
+
+    def take(self):
+        sent, self.sent = self.sent, []
+        return sent
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _frames(n):
+    encoder = DeltaEncoder(keyframe_every=100)
+    frames = []
+    for i in range(n):
+        delta = encoder.encode({"cpu": float(i)})
+        frames.append(StreamFrame("core", delta, encoder.keyframe(), i, 1000 * i))
+    return frames
+
+
+def test_outbox_keeps_one_frame_in_flight_and_conflates_the_rest():
+    async def main():
+        sio = FakeSio()
+        outbox = ClientOutbox(sio, "a", "json")
+        f1, f2, f3, f4 = _frames(4)
+
+        await outbox.offer(f1)
+        await outbox.offer(f2)
+        await outbox.offer(f3)  # replaces f2 while f1 waits
+        (_, payload, _, ack), = sio.take()
+        assert wire_format.decode(payload)["kf"] == 1
+        assert outbox.stats()["conflated"] == 1
+
+        await ack()
+        (_, payload, _, ack), = sio.take()
+        frame = wire_format.decode(payload)
+        # f3 does not follow f1, so it goes out whole
+        assert (frame["seq"], frame.get("kf"), frame["d"]) == (3, 1, {"cpu": 2.0})
+
+        await ack()
+        await outbox.offer(f4)
+        (_, payload, _, _), = sio.take()
+        frame = wire_format.decode(payload)
+        assert (frame["seq"], frame["base"], frame["d"]) == (4, 3, {"cpu": 3.0})
+        assert outbox.stats()["delivered"] == 2
+
+    asyncio.run(main())
+
+
+def test_outbox_expired_frame_is_followed_by_a_keyframe():
+    async def main():
+        sio = FakeSio()
+        clock = FakeClock()
+        outbox = ClientOutbox(sio, "a", "json", clock=clock)
+        f1, f2, f3 = _frames(3)
+
+        await outbox.offer(f1)
+        (_, _, _, ack), = sio.take()
+        await ack()
+        await outbox.offer(f2)
+        (_, _, _, lost_ack), = sio.take()
+        await outbox.offer(f3)
+
+        clock.now = 20.0
+        await outbox.expire(timeout=10.0)
+        (_, payload, _, _), = sio.take()
+        # f3's base is f2, which the client may never have applied
+        assert wire_format.decode(payload)["kf"] == 1
+        assert outbox.stats()["dropped"] == 1
+
+        await lost_ack()  # too late, and ignored
+        assert outbox.stats()["delivered"] == 1
+
+    asyncio.run(main())
+
+
+def test_table_feed_encodes_once_per_format_and_conflates_slow_clients():
+    async def main():
+        sio = FakeSio()
+        table = [{"pid": 1, "cpu": 5.0}]
+        feed = TableFeed(sio, "process_update", lambda: table)
+        feed.add("a", "json")
+        feed.add("b", "json")
+        feed.add("c", "msgpack")
+
+        await feed.publish({"changed": [{"pid": 1, "cpu": 5.0}], "removed": []})
+        sent = sio.take()
+        assert [s[2] for s in sent] == ["a", "b", "c"]
+        assert sent[0][1] is sent[1][1]
+        assert wire_format.decode(sent[2][1])["changed"][0]["pid"] == 1
+
+        # a and c ack; b is still busy when the next two updates come
+        await sent[0][3]()
+        await sent[2][3]()
+        await feed.publish({"changed": [{"pid": 2, "cpu": 1.0}], "removed": []})
+        await feed.publish({"changed": [], "removed": [2]})
+        assert [s[2] for s in sio.sent] == ["a", "c"]
+        # One count per client that falls behind: b on the first, a and c on the second
+        assert feed.stats()["conflated"] == 3
+        sio.take()
+
+        # b's ack is answered with the whole table rather than the backlog
+        await sent[1][3]()
+        (event, payload, sid, _), = sio.take()
+        assert (event, sid) == ("process_update", "b")
+        assert wire_format.decode(payload) == {"changed": table, "removed": [], "full": True}
+
+    asyncio.run(main())
+
+
+def test_table_feed_expires_lost_acks_with_a_snapshot():
+    async def main():
+        sio = FakeSio()
+        clock = FakeClock()
+        feed = TableFeed(sio, "process_update", lambda: [], clock=clock)
+        feed.add("a", "json")
+        await feed.publish({"changed": [], "removed": [1]})
+        (_, _, _, late_ack), = sio.take()
+
+        clock.now = 1.0
+        await feed.expire(timeout=5.0)
+        assert sio.take() == []
+
+        clock.now = 10.0
+        await feed.expire(timeout=5.0)
+        (_, payload, _, _), = sio.take()
+        assert wire_format.decode(payload)["full"] is True
+        assert feed.stats()["dropped"] == 1
+
+        # The written-off update's ack does not free the snapshot's slot
+        await late_ack()
+        await feed.publish({"changed": [], "removed": [2]})
+        assert sio.take() == []
+
+        feed.remove("a")
+        await feed.publish({"changed": [], "removed": [3]})
+        assert sio.take() == []
+
+    asyncio.run(main())
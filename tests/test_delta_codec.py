@@ -0,0 +1,122 @@
+import copy
+import random
+
+from pc_server.delta_codec import DeltaEncoder
+from pi_client.delta_decoder import DeltaDecoder, TickAssembler
+
+
+def _stats(rng):
+    stats = {
+        "cpu": rng.uniform(0, 100),
+        "memory": rng.uniform(0, 100),
+        "disks": {m: rng.choice([None, rng.uniform(0, 100)]) for m in ("/", "/home", "/mnt")
+                  if rng.random() < 0.8},
+        "window": {"cpu": {"min": rng.uniform(0, 50), "max": rng.uniform(50, 100)}},
+        "samples": rng.randint(0, 3),
+    }
+    if rng.random() < 0.5:
+        stats["gpu"] = rng.uniform(0, 100)
+    return stats
+
+
+def _wire(frame):
+    # Frames cross a socket; the decoder must never share dicts with the encoder
+    return copy.deepcopy(frame)
+
+
+def test_round_trip_matches_quantised_state():
+    rng = random.Random(1)
+    enc = DeltaEncoder(keyframe_every=5, precision=1)
+    dec = DeltaDecoder()
+    for _ in range(200):
+        stats = _stats(rng)
+        state = dec.apply(_wire(enc.encode(stats)))
+        assert state == enc._quantise(stats)
+    assert dec.gaps == 0
+
+
+def test_deltas_only_carry_changes():
+    enc = DeltaEncoder(keyframe_every=100, precision=1)
+    enc.encode({"cpu": 10.0, "disks": {"/": 50.0, "/mnt": 1.0}})
+    frame = enc.encode({"cpu": 10.04, "disks": {"/": 51.0}})
+    assert frame["d"] == {"disks": {"/": 51.0}}
+    assert frame["rm"] == [["disks", "/mnt"]]
+    assert frame["base"] == frame["seq"] - 1
+
+
+def test_gap_drops_state_until_keyframe():
+    rng = random.Random(2)
+    enc = DeltaEncoder(keyframe_every=1000, precision=1)
+    dec = DeltaDecoder()
+    assert dec.apply(_wire(enc.encode(_stats(rng)))) is not None
+
+    enc.encode(_stats(rng))  # lost in transit
+    assert dec.apply(_wire(enc.encode(_stats(rng)))) is None
+    assert dec.gaps == 1
+    # Still nothing to build on
+    assert dec.apply(_wire(enc.encode(_stats(rng)))) is None
+    assert dec.gaps == 1
+
+    enc.request_keyframe()
+    stats = _stats(rng)
+    frame = enc.encode(stats)
+    assert frame.get("kf") == 1
+    assert dec.apply(_wire(frame)) == enc._quantise(stats)
+    stats = _stats(rng)
+    assert dec.apply(_wire(enc.encode(stats))) == enc._quantise(stats)
+
+
+def test_keyframe_snapshot_resyncs_mid_stream():
+    rng = random.Random(3)
+    enc = DeltaEncoder(keyframe_every=1000, precision=1)
+    for _ in range(10):
+        enc.encode(_stats(rng))
+    # A client joining late starts from keyframe() and follows the deltas
+    dec = DeltaDecoder()
+    assert dec.apply(_wire(enc.keyframe())) is not None
+    for _ in range(10):
+        stats = _stats(rng)
+        assert dec.apply(_wire(enc.encode(stats))) == enc._quantise(stats)
+
+
+def test_frames_without_seq_become_the_state():
+    dec = DeltaDecoder()
+    frame = {"cpu": 1.0, "memory": 2.0}
+    assert dec.apply(frame) == frame
+    # Older servers send everything each time; nothing carries over
+    assert dec.apply({"cpu": 3.0}) == {"cpu": 3.0}
+    assert dec.state == {"cpu": 3.0}
+
+
+def _assembler(groups=("core", "io")):
+    ticks = []
+    return TickAssembler(groups, lambda t, h, seen: ticks.append((t, h, sorted(seen)))), ticks
+
+
+def test_tick_fires_once_every_group_arrived():
+    asm, ticks = _assembler()
+    # The io frame of a tick may come after core, or before it
+    for t, order in ((1000, ("core", "io")), (2000, ("io", "core"))):
+        for g in order:
+            asm.start(t)
+            assert not ticks or ticks[-1][0] != t
+            asm.add(g, h=t // 1000)
+        assert ticks[-1] == (t, t // 1000, ["core", "io"])
+    assert len(ticks) == 2
+
+
+def test_incomplete_tick_fires_when_the_next_starts():
+    asm, ticks = _assembler()
+    asm.start(1000)
+    asm.add("core", h=1)
+    # io for 1000 was conflated away; its next frame is already 2000
+    asm.start(2000)
+    assert ticks == [(1000, 1, ["core"])]
+    asm.add("io", h=2)
+    asm.start(2000)
+    asm.add("core", h=2)
+    assert ticks[-1] == (2000, 2, ["core", "io"])
+
+    asm.reset()
+    asm.start(3000)
+    assert len(ticks) == 2
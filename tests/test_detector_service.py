@@ -0,0 +1,63 @@
+import math
+import time
+
+import pytest
+
+from pi_client.detector_service import DetectorService
+from pi_client.realtime_anomaly import RealtimeAnomalyDetector
+
+
+def _wait_for(cond, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.02)
+
+
+@pytest.fixture(scope="module")
+def detector():
+    detector = RealtimeAnomalyDetector()
+    assert detector.ready(60)
+    return detector
+
+
+def test_missing_readings_only_affect_their_own_sample(detector):
+    detector.reset()
+    results = detector.check_batch([
+        (None, 50.0, 60.0, 100.0),  # nothing to hold yet
+        (10.0, 50.0, 60.0, 100.0),
+        (12.0, 51.0, 60.0, 100.0),
+        (10.0, 50.0, None, None),
+        (float("nan"), 50.0, 60.0, 99.0),
+    ])
+    assert math.isnan(results[0][0]) and results[0][2] is None
+    for score, threshold, final in results[1:]:
+        assert not math.isnan(score)
+        assert final is False
+    # Held values: disk and battery did not move, so neither did their EWMAs
+    assert detector.disk_s.last == 60.0
+    assert detector.batt_s.last < 100.0
+
+
+def test_worker_is_restarted_after_it_dies():
+    results = []
+    service = DetectorService(results.append, restart_delay=0.1)
+    try:
+        service.submit(1, 10.0, 50.0, 60.0, 100.0)
+        _wait_for(lambda: len(results) == 1)
+        old_pid = service.stats()["pid"]
+
+        service._proc.kill()
+        _wait_for(lambda: service.restarts == 1 and service.stats()["pid"] != old_pid)
+        service.submit(2, 10.0, 50.0, 60.0, None)
+        _wait_for(lambda: len(results) == 2)
+        # Smoothing restarted with the worker, so battery has no value to hold
+        assert results[1]["ts_ms"] == 2
+        assert results[1]["anomaly"] is None
+        service.submit(3, 10.0, 50.0, 60.0, 100.0)
+        _wait_for(lambda: len(results) == 3)
+        assert results[2]["anomaly"] is False
+    finally:
+        service.close()
+    assert service.stats()["restarts"] == 1
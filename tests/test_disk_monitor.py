@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import namedtuple
+
+import pytest
+
+from pc_server.monitors import disk_monitor
+
+Usage = namedtuple("Usage", "total used free percent")
+
+
+@pytest.fixture
+def fake_mounts(monkeypatch):
+    usage = {
+        "/": Usage(100, 40, 60, 40.0),
+        "/data": Usage(300, 240, 60, 80.0),
+    }
+    hung = threading.Event()
+    state = {"hang": set(), "fail": set()}
+
+    def disk_usage(mount):
+        if mount in state["hang"]:
+            hung.wait()
+        if mount in state["fail"]:
+            raise OSError("gone")
+        return usage[mount]
+
+    monkeypatch.setattr(disk_monitor, "get_mounts", lambda: list(usage))
+    monkeypatch.setattr(disk_monitor.psutil, "disk_usage", disk_usage)
+    monkeypatch.setattr(disk_monitor, "_pending", {})
+    monkeypatch.setattr(disk_monitor, "_usage", {})
+    yield usage, state
+    hung.set()
+
+
+def _settle():
+    # Let the pool finish whatever can finish
+    deadline = time.monotonic() + 1.0
+    while time.monotonic() < deadline:
+        if all(f.done() for f in disk_monitor._pending.values()):
+            return
+        time.sleep(0.01)
+
+
+def test_first_round_is_ready_before_the_first_call(fake_mounts):
+    disk_monitor._start_round(disk_monitor.get_mounts())
+    _settle()
+    stats = disk_monitor.get_disk_stats()
+    assert stats["disks"] == {"/": 40.0, "/data": 80.0}
+    assert stats["disk"] == 70.0  # 280 used of 400
+
+
+def test_hung_mount_keeps_its_last_value_and_never_blocks(fake_mounts):
+    usage, state = fake_mounts
+    disk_monitor._start_round(disk_monitor.get_mounts())
+    _settle()
+    disk_monitor.get_disk_stats()
+    _settle()
+
+    state["hang"].add("/data")
+    usage["/"] = Usage(100, 50, 50, 50.0)
+    disk_monitor.get_disk_stats()  # starts the round that hangs
+    _settle()
+    started = time.perf_counter()
+    stats = disk_monitor.get_disk_stats()
+    assert time.perf_counter() - started < 0.05
+    assert stats["disks"] == {"/": 50.0, "/data": 80.0}
+
+
+def test_failed_or_never_answered_mounts_are_none(fake_mounts):
+    _, state = fake_mounts
+    state["fail"].add("/")
+    state["hang"].add("/data")
+    disk_monitor._start_round(disk_monitor.get_mounts())
+    _settle()
+    stats = disk_monitor.get_disk_stats()
+    assert stats == {"disk": None, "disks": {"/": None, "/data": None}}
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+from pi_client.fast_scorer import FastIsolationScorer
+
+
+@pytest.fixture(scope="module")
+def model():
+    rng = np.random.default_rng(0)
+    X = np.column_stack([
+        rng.uniform(0, 100, 2000),
+        rng.normal(55, 10, 2000),
+        rng.normal(70, 0.5, 2000),
+        rng.choice([100.0, 80.0, 35.5], 2000),
+    ])
+    scaler = StandardScaler().fit(X)
+    iso = IsolationForest(n_estimators=50, max_samples=256, max_features=0.75,
+                          random_state=0).fit(scaler.transform(X))
+    return iso, scaler, X
+
+
+def test_batch_matches_score_samples(model):
+    iso, scaler, X = model
+    scorer = FastIsolationScorer.from_model(iso, scaler)
+    rng = np.random.default_rng(1)
+    # Training rows hit thresholds exactly; fresh rows go off the end of the ranges
+    X_new = np.vstack([X[:500], rng.uniform(-50, 150, (500, 4))])
+    expected = iso.score_samples(scaler.transform(X_new))
+    np.testing.assert_allclose(scorer.score_batch(X_new), expected, rtol=1e-12)
+
+
+def test_single_matches_batch(model):
+    iso, scaler, X = model
+    scorer = FastIsolationScorer.from_model(iso, scaler)
+    batch = scorer.score_batch(X[:50])
+    for x, expected in zip(X[:50], batch):
+        assert scorer.score(x) == pytest.approx(expected, rel=1e-12)
+
+
+def test_without_scaler():
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(300, 3))
+    iso = IsolationForest(n_estimators=20, random_state=0).fit(X)
+    scorer = FastIsolationScorer.from_model(iso)
+    np.testing.assert_allclose(scorer.score_batch(X), iso.score_samples(X), rtol=1e-12)
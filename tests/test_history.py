@@ -0,0 +1,66 @@
+import asyncio
+
+from pc_server.broadcaster import Broadcaster
+from pc_server.history import HistoryBuffer
+from shared import wire_format
+
+
+def _filled(n, capacity=10):
+    history = HistoryBuffer(["cpu"], capacity=capacity)
+    for i in range(n):
+        history.append(1000 * i, {"cpu": float(i)})
+    return history
+
+
+def test_since_returns_rows_after_seq():
+    history = _filled(5)
+    rows, truncated = history.since(3)
+    assert rows == [[4, 3000, 3.0], [5, 4000, 4.0]]
+    assert not truncated
+    assert history.since(5) == ([], False)
+
+
+def test_since_flags_rows_that_fell_out():
+    history = _filled(15)
+    rows, truncated = history.since(2)
+    assert truncated
+    assert [r[0] for r in rows] == list(range(6, 16))
+    assert history.since(5) == (rows, False)
+
+
+def test_stride_keeps_the_newest_row():
+    history = _filled(10)
+    rows, _ = history.since(0, stride=4)
+    assert [r[0] for r in rows] == [2, 6, 10]
+
+
+class FakeSio:
+    def __init__(self):
+        self.sent = []
+
+    async def emit(self, event, payload, to=None, callback=None):
+        self.sent.append((event, payload, to))
+
+
+def test_subscribe_replays_missed_rows_for_the_same_epoch():
+    async def main():
+        sio = FakeSio()
+        broadcaster = Broadcaster(sio, sampler=None)
+        for i in range(6):
+            broadcaster.history.append(1000 * i, {"cpu": float(i)})
+        epoch = broadcaster.history.epoch
+
+        ack = await broadcaster.subscribe("a", ["core"], "1s", "json", since=4, epoch=epoch)
+        assert ack["h"] == 6 and ack["epoch"] == epoch
+        (event, payload, sid), = sio.sent
+        assert (event, sid) == ("stats_replay", "a")
+        batch = wire_format.decode(payload)
+        assert [r[0] for r in batch["rows"]] == [5, 6]
+        assert batch["fields"][:2] == ["seq", "ts"]
+
+        # A seq from an earlier server run is not replayed
+        sio.sent.clear()
+        await broadcaster.subscribe("a", ["core"], "1s", "json", since=4, epoch="old")
+        assert sio.sent == []
+
+    asyncio.run(main())
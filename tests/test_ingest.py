@@ -0,0 +1,86 @@
+import threading
+import time
+
+from pi_client.ingest import IngestPipeline, Stage
+
+
+def _gated_stage(**kwargs):
+    gate = threading.Event()
+    seen = []
+
+    def handler(item):
+        gate.wait()
+        seen.append(item)
+
+    return Stage("s", handler, **kwargs), gate, seen
+
+
+def _drain(stage):
+    stage.close()
+    assert not stage._thread.is_alive()
+
+
+def test_full_stage_sheds_oldest():
+    stage, gate, seen = _gated_stage(maxsize=3)
+    stage.put(0)
+    time.sleep(0.05)  # 0 is in the handler, the queue is empty
+    for i in range(1, 7):
+        stage.put(i)
+    gate.set()
+    _drain(stage)
+    assert seen == [0, 4, 5, 6]
+    assert stage.dropped == 3
+
+
+def test_kept_items_are_never_shed():
+    stage, gate, seen = _gated_stage(maxsize=2)
+    stage.put(0)
+    time.sleep(0.05)
+    stage.put("R1", keep=True)
+    for i in range(1, 5):
+        stage.put(i)
+    stage.put("R2", keep=True)
+    stage.put(5)
+    gate.set()
+    _drain(stage)
+    # Kept items count towards maxsize, so 4 goes to make room for 5
+    assert seen == [0, "R1", "R2", 5]
+    assert stage.dropped == 4
+
+
+def test_non_shedding_stage_never_blocks_or_drops():
+    stage, gate, seen = _gated_stage(maxsize=2, shed=False)
+    started = time.perf_counter()
+    for i in range(50):
+        stage.put(i)
+    assert time.perf_counter() - started < 0.1
+    gate.set()
+    _drain(stage)
+    assert seen == list(range(50))
+    assert stage.dropped == 0
+
+
+def test_handler_errors_do_not_stop_the_stage():
+    seen = []
+
+    def handler(item):
+        if item == 1:
+            raise ValueError(item)
+        seen.append(item)
+
+    stage = Stage("s", handler)
+    for i in range(3):
+        stage.put(i)
+    _drain(stage)
+    assert seen == [0, 2]
+    assert stage.stats()["errors"] == 1
+
+
+def test_pipeline_routes_to_named_stages():
+    a, b = [], []
+    pipeline = IngestPipeline([Stage("a", a.append), Stage("b", b.append)])
+    pipeline.submit(1)
+    pipeline.submit(2, stages=("b",))
+    pipeline.close()
+    assert a == [1]
+    assert b == [1, 2]
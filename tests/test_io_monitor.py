@@ -0,0 +1,27 @@
+import pytest
+
+from pc_server.monitors import io_monitor
+
+
+@pytest.fixture
+def sysfs(tmp_path, monkeypatch):
+    block = tmp_path / "block"
+    for name in ("sda", "sda1", "sda2", "nvme0n1", "dm-0", "md0", "loop0", "zram0"):
+        (block / name / "slaves").mkdir(parents=True)
+    for part in ("sda1", "sda2"):
+        (block / part / "partition").write_text("1")
+    (block / "dm-0" / "slaves" / "sda2").touch()
+    (block / "md0" / "slaves" / "nvme0n1").touch()
+    monkeypatch.setattr(io_monitor, "SYS_BLOCK", str(block))
+    monkeypatch.setattr(io_monitor, "_whole_disk", {})
+    return block
+
+
+def test_only_physical_disks_are_counted(sysfs):
+    whole = {name for name in ("sda", "sda1", "sda2", "nvme0n1", "dm-0", "md0", "loop0", "zram0")
+             if io_monitor._is_whole_disk(name)}
+    assert whole == {"sda", "nvme0n1"}
+
+
+def test_device_without_sysfs_entry_is_counted(sysfs):
+    assert io_monitor._is_whole_disk("vda")
@@ -0,0 +1,104 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from pi_client import migrate_db, rollup
+from pi_client.db_manager import METRIC_COLUMNS, SCHEMA_VERSION
+
+V1_SQL = """
+CREATE TABLE usage_log (
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    cpu REAL, memory REAL, disk REAL, gpu REAL, battery REAL
+)
+"""
+T0 = datetime(2024, 3, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def _ms(dt):
+    return int(dt.timestamp() * 1000)
+
+
+@pytest.fixture
+def v1_db(tmp_path):
+    conn = sqlite3.connect(tmp_path / "usage_log.db")
+    conn.execute(V1_SQL)
+    rows = []
+    for i in range(250):
+        t = T0 + timedelta(seconds=17 * i)
+        battery = None if i % 10 == 0 else 100.0 - i * 0.1
+        rows.append((t.strftime("%Y-%m-%d %H:%M:%S"), i % 100, 50.0 + i % 7, 70.0, None, battery))
+    conn.executemany("INSERT INTO usage_log VALUES (?, ?, ?, ?, ?, ?)", rows)
+    # Unparseable timestamps are dropped rather than given a bogus ts_ms
+    conn.execute("INSERT INTO usage_log VALUES ('not a date', 1, 1, 1, 1, 1)")
+    conn.commit()
+    yield conn, rows
+    conn.close()
+
+
+def _expected_rollup(rows, width):
+    """{(bucket, host): {metric: (n, sum, min, max)}} straight from the v1 rows."""
+    out = {}
+    for ts, *values in rows:
+        ts_ms = _ms(datetime.strptime(ts, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc))
+        bucket = out.setdefault((ts_ms // width * width, "pc"), {})
+        for m, v in zip(["cpu", "memory", "disk", "gpu", "battery"], values):
+            if v is None:
+                continue
+            n, s, lo, hi = bucket.get(m, (0, 0.0, v, v))
+            bucket[m] = (n + 1, s + v, min(lo, v), max(hi, v))
+    return out
+
+
+def _rollup_rows(conn, table):
+    cols = ", ".join(f"{m}_n, {m}_sum, {m}_min, {m}_max" for m in METRIC_COLUMNS)
+    out = {}
+    for bucket_ms, host, *vals in conn.execute(f"SELECT bucket_ms, host, {cols} FROM {table}"):
+        out[(bucket_ms, host)] = {
+            m: tuple(vals[4 * i:4 * i + 4]) for i, m in enumerate(METRIC_COLUMNS) if vals[4 * i]
+        }
+    return out
+
+
+def test_v1_to_v3(v1_db):
+    conn, rows = v1_db
+    copied = migrate_db.migrate(conn, host="pc", chunk_rows=7)
+    assert copied == len(rows)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION == 3
+
+    columns = [r[1] for r in conn.execute("PRAGMA table_info(usage_log)")]
+    assert columns == ["id", "ts_ms", "host"] + METRIC_COLUMNS
+    indexes = [r[1] for r in conn.execute("PRAGMA index_list(usage_log)")]
+    assert "usage_log_ts_ms" in indexes
+
+    got = conn.execute("SELECT id, ts_ms, host, cpu, battery, net_rx FROM usage_log ORDER BY id").fetchall()
+    assert len(got) == len(rows)
+    for (id_, ts_ms, host, cpu, battery, net_rx), (ts, cpu0, _, _, _, battery0), rowid in zip(
+            got, rows, range(1, len(rows) + 1)):
+        assert id_ == rowid
+        assert ts_ms == _ms(datetime.strptime(ts, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc))
+        assert (host, cpu, battery, net_rx) == ("pc", cpu0, battery0, None)
+
+    for table, width in rollup.TIERS.items():
+        expected = _expected_rollup(rows, width)
+        got = _rollup_rows(conn, table)
+        assert got.keys() == expected.keys()
+        for key, metrics in expected.items():
+            assert got[key].keys() == metrics.keys()
+            for m, (n, s, lo, hi) in metrics.items():
+                assert got[key][m][0] == n
+                assert got[key][m][1] == pytest.approx(s, rel=1e-12)
+                assert got[key][m][2:] == (lo, hi)
+
+    # Already current: nothing to do
+    assert migrate_db.migrate(conn) == 0
+
+
+def test_fresh_database(tmp_path):
+    conn = sqlite3.connect(tmp_path / "fresh.db")
+    assert migrate_db.migrate(conn) == 0
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"usage_log", *rollup.TIERS} <= tables
+    conn.close()
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from pi_client.model_bundle import BundleError, load_bundle, write_bundle
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    path = tmp_path / "model.bin"
+    arrays = {"w": np.arange(12, dtype=np.float64).reshape(3, 4), "n": np.int64(7)}
+    write_bundle(str(path), arrays, {"threshold": -0.5})
+    return path
+
+
+def test_round_trip(bundle):
+    arrays, meta = load_bundle(str(bundle))
+    assert meta == {"threshold": -0.5}
+    assert np.array_equal(arrays["w"], np.arange(12.0).reshape(3, 4))
+    assert arrays["n"].shape == () and arrays["n"] == 7
+
+
+def test_empty_file_is_a_bundle_error(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    with pytest.raises(BundleError):
+        load_bundle(str(path))
+
+
+# 4: inside the prefix, 40: inside the header, -60: inside the last array
+@pytest.mark.parametrize("keep", [4, 40, -60])
+def test_truncated_file_is_a_bundle_error(bundle, keep):
+    data = bundle.read_bytes()
+    bundle.write_bytes(data[:keep])
+    with pytest.raises(BundleError):
+        load_bundle(str(bundle))
+    # Without the checksum, short arrays are caught while mapping them
+    with pytest.raises(BundleError):
+        load_bundle(str(bundle), verify=False)
+
+
+def test_corrupt_arrays_fail_the_checksum(bundle):
+    data = bytearray(bundle.read_bytes())
+    data[-1] ^= 0xFF
+    bundle.write_bytes(bytes(data))
+    with pytest.raises(BundleError, match="checksum"):
+        load_bundle(str(bundle))
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "model.pkl"
+    path.write_bytes(b"\x80\x04" + b"\0" * 64)
+    with pytest.raises(BundleError, match="not a model bundle"):
+        load_bundle(str(path))
@@ -0,0 +1,25 @@
+import time
+
+from pc_server.monitors.process_monitor import ProcessCollector
+
+
+def test_whole_tick_stays_near_the_budget():
+    collector = ProcessCollector(budget_ms=2.0)
+    collector.collect()
+    for _ in range(5):
+        time.sleep(0.01)
+        update = collector.collect()
+        # Slack covers listing pids and the last row or two past the deadline
+        assert collector.last_cost_ms < 2.0 + 15.0
+    assert set(update) == {"changed", "removed"}
+
+
+def test_cmd_is_sent_when_a_pid_enters_the_table():
+    collector = ProcessCollector(budget_ms=200.0)
+    first = collector.collect()
+    assert first["changed"] and all("cmd" in row for row in first["changed"])
+    for _ in range(3):
+        time.sleep(0.01)
+        published = {row["pid"] for row in collector.table()}
+        for row in collector.collect()["changed"]:
+            assert ("cmd" in row) == (row["pid"] not in published)
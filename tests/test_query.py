@@ -0,0 +1,75 @@
+import math
+import sqlite3
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from pi_client import migrate_db, rollup
+from pi_client.db_manager import INSERT_SQL, METRIC_COLUMNS
+from pi_client.query import fetch_range, iter_range
+
+
+def _raw(ts_ms, host, **values):
+    return (ts_ms, host) + tuple(values.get(m) for m in METRIC_COLUMNS)
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = tmp_path / "usage_log.db"
+    conn = sqlite3.connect(path)
+    migrate_db.migrate(conn)
+    rows = [
+        _raw(0, "pc", cpu=10.0, memory=40.0),
+        _raw(20_000, "laptop", cpu=30.0, memory=None),
+        _raw(40_000, "pc", cpu=20.0, memory=50.0),
+        _raw(60_000, "pc", cpu=60.0, memory=70.0),
+        _raw(120_000, "pc", cpu=80.0, memory=90.0),
+    ]
+    with conn:
+        conn.executemany(INSERT_SQL, rows)
+        rollup.update(conn, rows)
+    conn.close()
+    return str(path)
+
+
+def test_raw_range_is_half_open_and_chunked(db):
+    ts, values = fetch_range(20_000, 120_000, ["cpu", "memory"], path=db, chunk_rows=2)
+    assert ts.dtype == np.int64 and values.dtype == np.float64
+    assert ts.tolist() == [20_000, 40_000, 60_000]
+    assert values[:, 0].tolist() == [30.0, 20.0, 60.0]
+    assert math.isnan(values[0, 1])
+
+
+def test_open_ends_and_datetimes(db):
+    ts, _ = fetch_range(path=db)
+    assert len(ts) == 5
+    start = datetime.fromtimestamp(60, tz=timezone.utc)
+    ts, values = fetch_range(start, None, ["cpu"], path=db)
+    assert ts.tolist() == [60_000, 120_000]
+    assert values.shape == (2, 1)
+
+
+def test_empty_range(db):
+    ts, values = fetch_range(500_000, None, ["cpu", "memory"], path=db)
+    assert ts.shape == (0,) and values.shape == (0, 2)
+
+
+def test_minute_rollup_combines_hosts(db):
+    ts, values = fetch_range(None, None, ["cpu", "memory"], resolution="1m", path=db)
+    assert ts.tolist() == [0, 60_000, 120_000]
+    assert values[0].tolist() == [20.0, 45.0]
+    assert values[1].tolist() == [60.0, 70.0]
+
+
+def test_unknown_resolution(db):
+    with pytest.raises(ValueError):
+        fetch_range(path=db, resolution="5m")
+
+
+def test_iter_range_matches_fetch_range(db):
+    chunks = list(iter_range(0, None, ["cpu"], path=db, chunk_rows=2))
+    assert [len(ts) for ts, _ in chunks] == [2, 2, 1]
+    ts, values = fetch_range(0, None, ["cpu"], path=db)
+    assert np.array_equal(np.concatenate([c[0] for c in chunks]), ts)
+    assert np.array_equal(np.concatenate([c[1] for c in chunks]), values)
@@ -0,0 +1,51 @@
+from collections import namedtuple
+
+from pc_server.monitors.rate_engine import CounterRateEngine
+
+Counters = namedtuple("Counters", "read_bytes write_bytes")
+
+
+def _engine(wrap=None):
+    return CounterRateEngine({"read_bytes": "read_bps", "write_bytes": "write_bps"}, wrap=wrap)
+
+
+def test_first_tick_is_a_baseline():
+    engine = _engine()
+    assert engine.update({"sda": Counters(100, 200)}, now=0.0) == {}
+    rates = engine.update({"sda": Counters(300, 200)}, now=2.0)
+    assert rates == {"sda": {"read_bps": 100.0, "write_bps": 0.0}}
+
+
+def test_counter_wrap():
+    wrap = 1 << 32
+    engine = _engine(wrap=wrap)
+    engine.update({"sda": Counters(wrap - 1000, 0)}, now=0.0)
+    rates = engine.update({"sda": Counters(3000, 0)}, now=1.0)
+    assert rates["sda"]["read_bps"] == 4000.0
+
+
+def test_reset_reports_zero_then_resumes():
+    wrap = 1 << 32
+    engine = _engine(wrap=wrap)
+    engine.update({"sda": Counters(5000, 10)}, now=0.0)
+    # Low in the range, so not a wrap: the device was re-enumerated
+    rates = engine.update({"sda": Counters(100, 10)}, now=1.0)
+    assert rates["sda"]["read_bps"] == 0.0
+    rates = engine.update({"sda": Counters(600, 10)}, now=2.0)
+    assert rates["sda"]["read_bps"] == 500.0
+
+
+def test_backwards_without_wrap_is_a_reset():
+    engine = _engine()
+    engine.update({"sda": Counters(1 << 40, 0)}, now=0.0)
+    assert engine.update({"sda": Counters(10, 0)}, now=1.0)["sda"]["read_bps"] == 0.0
+
+
+def test_vanished_device_is_forgotten():
+    engine = _engine()
+    engine.update({"sda": Counters(0, 0), "sdb": Counters(0, 0)}, now=0.0)
+    engine.update({"sda": Counters(10, 0)}, now=1.0)
+    # sdb comes back with a fresh baseline rather than a huge delta
+    rates = engine.update({"sda": Counters(20, 0), "sdb": Counters(10**9, 0)}, now=2.0)
+    assert rates == {"sda": {"read_bps": 10.0, "write_bps": 0.0}}
+    assert engine.totals(rates) == {"read_bps": 10.0, "write_bps": 0.0}
@@ -0,0 +1,28 @@
+from pc_server.ring_buffer import MetricRing
+
+
+def test_window_covers_samples_since_the_last_call_per_key():
+    ring = MetricRing(["cpu", "memory"], capacity=16)
+    for cpu in (10.0, 95.0, 12.0):  # a spike between two emits
+        ring.push({"cpu": cpu, "memory": 50.0})
+    summary, n = ring.window("5s")
+    assert n == 3
+    assert summary["cpu"] == {"min": 10.0, "max": 95.0, "mean": 39.0, "last": 12.0}
+
+    ring.push({"cpu": 20.0, "memory": None})
+    summary, n = ring.window("5s")
+    assert n == 1
+    assert summary["cpu"]["max"] == 20.0
+    assert summary["memory"] is None
+    # Another rate has its own window
+    assert ring.window("1s")[1] == 4
+
+
+def test_window_across_the_wrap_is_capped_at_capacity():
+    ring = MetricRing(["cpu"], capacity=4)
+    for i in range(10):
+        ring.push({"cpu": float(i)})
+    summary, n = ring.window()
+    assert n == 4
+    assert summary["cpu"] == {"min": 6.0, "max": 9.0, "mean": 7.5, "last": 9.0}
+    assert ring.window() == ({"cpu": None}, 0)
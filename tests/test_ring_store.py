@@ -0,0 +1,60 @@
+import numpy as np
+
+from pi_client.ring_store import RingStore
+
+METRICS = ["cpu", "memory"]
+
+
+def _fill(store, n, start=0):
+    for i in range(start, start + n):
+        store.append(1000 * i, {"cpu": float(i), "memory": float(-i)})
+
+
+def test_window_is_a_contiguous_view_across_the_wrap():
+    store = RingStore(METRICS, capacity=8)
+    for n in range(1, 30):
+        _fill(store, 1, start=n - 1)
+        ts, cols = store.window()
+        k = min(n, 8)
+        assert np.shares_memory(ts, store._ts)
+        assert np.shares_memory(cols, store._cols)
+        assert ts.flags.c_contiguous
+        np.testing.assert_array_equal(ts, 1000 * np.arange(n - k, n))
+        np.testing.assert_array_equal(cols[0], np.arange(n - k, n))
+        np.testing.assert_array_equal(cols[1], -np.arange(n - k, n))
+
+
+def test_window_limits():
+    store = RingStore(METRICS, capacity=8)
+    _fill(store, 13)
+    ts, _ = store.window(n=3)
+    np.testing.assert_array_equal(ts, [10000, 11000, 12000])
+    ts, cols = store.window(since_ms=9500)
+    np.testing.assert_array_equal(ts, [10000, 11000, 12000])
+    np.testing.assert_array_equal(store.column("cpu", n=2), [11, 12])
+    assert store.summary("cpu", since_ms=10000) == {"min": 10.0, "max": 12.0, "mean": 11.0, "n": 3}
+
+
+def test_extend_matches_append():
+    rng = np.random.default_rng(0)
+    appended = RingStore(METRICS, capacity=16)
+    extended = RingStore(METRICS, capacity=16)
+    ts = np.arange(45, dtype=np.int64) * 250
+    values = rng.random((45, 2))
+    for t, row in zip(ts, values):
+        appended.append(int(t), dict(zip(METRICS, row)))
+    for lo, hi in ((0, 5), (5, 6), (6, 40), (40, 45)):
+        extended.extend(ts[lo:hi], values[lo:hi])
+    for a, b in zip(appended.window(), extended.window()):
+        np.testing.assert_array_equal(a, b)
+    # Batches longer than the ring keep their newest rows
+    big = RingStore(METRICS, capacity=16)
+    big.extend(ts, values)
+    np.testing.assert_array_equal(big.window()[0], ts[-16:])
+
+
+def test_missing_metrics_are_nan():
+    store = RingStore(METRICS, capacity=4)
+    store.append(0, {"cpu": 1.0})
+    assert np.isnan(store.column("memory")[0])
+    assert store.summary("memory") is None
@@ -0,0 +1,73 @@
+import sqlite3
+
+from pi_client import rollup
+from pi_client.db_manager import METRIC_COLUMNS
+
+
+def _rollup_rows(conn, table):
+    cols = ", ".join(f"{m}_n, {m}_sum, {m}_min, {m}_max" for m in METRIC_COLUMNS)
+    out = {}
+    for bucket_ms, host, *vals in conn.execute(f"SELECT bucket_ms, host, {cols} FROM {table}"):
+        out[(bucket_ms, host)] = {
+            m: tuple(vals[4 * i:4 * i + 4]) for i, m in enumerate(METRIC_COLUMNS) if vals[4 * i]
+        }
+    return out
+
+
+def _raw(ts_ms, host, **values):
+    return (ts_ms, host) + tuple(values.get(m) for m in METRIC_COLUMNS)
+
+
+def test_rollup_upserts_merge_batches(tmp_path):
+    rows = [
+        _raw(0, "pc", cpu=10.0, battery=None),
+        _raw(30_000, "pc", cpu=30.0, battery=80.0),
+        _raw(59_999, None, cpu=5.0),
+        _raw(61_000, "pc", cpu=20.0, battery=60.0),
+        _raw(90_000, "pc", cpu=None, battery=90.0),
+    ]
+    whole = sqlite3.connect(tmp_path / "whole.db")
+    split = sqlite3.connect(tmp_path / "split.db")
+    for conn in (whole, split):
+        rollup.create_tables(conn)
+    with whole:
+        rollup.update(whole, rows)
+    # One row per commit, the way the writer can split them
+    for row in rows:
+        with split:
+            rollup.update(split, [row])
+
+    for table in rollup.TIERS:
+        assert _rollup_rows(split, table) == _rollup_rows(whole, table)
+
+    minute = _rollup_rows(split, "usage_1m")
+    assert minute[(0, "pc")]["cpu"] == (2, 40.0, 10.0, 30.0)
+    # A NULL min/max from a batch with no value never wipes out a real one
+    assert minute[(0, "pc")]["battery"] == (1, 80.0, 80.0, 80.0)
+    assert minute[(0, "")]["cpu"] == (1, 5.0, 5.0, 5.0)
+    assert minute[(60_000, "pc")]["battery"] == (2, 150.0, 60.0, 90.0)
+    hour = _rollup_rows(split, "usage_1h")
+    assert hour[(0, "pc")]["cpu"] == (3, 60.0, 10.0, 30.0)
+    sq = split.execute("SELECT cpu_sq FROM usage_1h WHERE host = 'pc'").fetchone()[0]
+    assert sq == 10.0 ** 2 + 30.0 ** 2 + 20.0 ** 2
+
+
+def test_prune_keeps_hourly_rollups(tmp_path):
+    from pi_client import migrate_db
+    conn = sqlite3.connect(tmp_path / "usage_log.db")
+    migrate_db.migrate(conn)
+    day = 86_400_000
+    now = 40 * day
+    rows = [_raw(now - age * day, "pc", cpu=1.0) for age in (35, 31, 29, 1)]
+    with conn:
+        conn.executemany(
+            f"INSERT INTO usage_log (ts_ms, host, {', '.join(METRIC_COLUMNS)}) "
+            f"VALUES (?, ?, {', '.join('?' for _ in METRIC_COLUMNS)})", rows)
+        rollup.update(conn, rows)
+
+    deleted = rollup.prune(conn, raw_keep_ms=30 * day, minute_keep_ms=2 * day, now_ms=now)
+    assert deleted == 2 + 3
+    assert conn.execute("SELECT count(*) FROM usage_log").fetchone()[0] == 2
+    assert conn.execute("SELECT count(*) FROM usage_1m").fetchone()[0] == 1
+    assert conn.execute("SELECT count(*) FROM usage_1h").fetchone()[0] == 4
+    conn.close()
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+from pc_server.sampler import LoopLagMonitor, StatsSampler
+from pc_server.system_monitor import CollectorScheduler
+
+
+def _scheduler():
+    cpu = iter(range(10**6))
+    return CollectorScheduler([
+        ("cpu", lambda: float(next(cpu)), 0.01),
+        ("memory", lambda: 50.0, 0.05),
+    ])
+
+
+def test_samples_reach_the_loop():
+    async def main():
+        sampler = StatsSampler(_scheduler(), metrics=["cpu", "memory"])
+        sampler.start(asyncio.get_running_loop())
+        try:
+            first = await asyncio.wait_for(sampler.next_sample(), 1.0)
+            assert first["memory"] == 50.0
+            await asyncio.sleep(0.1)
+            later = await asyncio.wait_for(sampler.next_sample(), 1.0)
+            assert later["cpu"] > first["cpu"]
+            assert sampler.latest_ts_ms <= int(time.time() * 1000)
+
+            frame = sampler.frame("5s")
+            window = frame["window"]["cpu"]
+            assert frame["window_samples"] >= 2
+            assert window["min"] < window["max"] == window["last"]
+            # The window for a key restarts after each frame
+            assert sampler.frame("5s")["window_samples"] <= 2
+        finally:
+            sampler.stop()
+        return sampler
+
+    sampler = asyncio.run(main())
+    assert not sampler._thread.is_alive()
+    assert sampler.samples >= 2
+
+
+def test_collection_runs_off_the_loop():
+    def slow():
+        time.sleep(0.2)
+        return 1.0
+
+    async def main():
+        sampler = StatsSampler(CollectorScheduler([("cpu", slow, 1.0)]), metrics=["cpu"])
+        lag = LoopLagMonitor(interval=0.01, blocked_after=0.05)
+        task = asyncio.create_task(lag.run())
+        sampler.start(asyncio.get_running_loop())
+        try:
+            await asyncio.wait_for(sampler.next_sample(), 1.0)
+        finally:
+            sampler.stop()
+            task.cancel()
+        return sampler, lag
+
+    sampler, lag = asyncio.run(main())
+    assert sampler.last_collect_ms >= 200
+    assert lag.ticks > 5
+    assert lag.blocked_events == 0
+
+
+def test_loop_lag_counts_blocking_calls():
+    async def main():
+        lag = LoopLagMonitor(interval=0.01, blocked_after=0.05)
+        task = asyncio.create_task(lag.run())
+        await asyncio.sleep(0.05)
+        time.sleep(0.15)  # blocks the loop
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return lag.snapshot()
+
+    snap = asyncio.run(main())
+    assert snap["blocked_events"] == 1
+    assert snap["max_lag_ms"] >= 100
+    assert snap["total_blocked_ms"] >= 100
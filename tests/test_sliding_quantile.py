@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from pi_client.sliding_quantile import SlidingQuantile
+
+
+@pytest.mark.parametrize("window", [1, 7, 500])
+def test_matches_percentile_within_one_bin(window):
+    rng = np.random.default_rng(window)
+    # Isolation scores sit in [-1, 0], bunched around -0.45
+    values = np.clip(rng.normal(-0.45, 0.08, 3000), -1.0, 0.0)
+    sq = SlidingQuantile(window)
+    for i, x in enumerate(values):
+        sq.add(x)
+        if i % 97 == 0 or i == len(values) - 1:
+            recent = values[max(0, i + 1 - window):i + 1]
+            assert sq.count == len(recent)
+            for q in (0.0, 0.01, 0.5, 0.99, 1.0):
+                assert sq.quantile(q) == pytest.approx(np.percentile(recent, 100 * q), abs=sq.width)
+
+
+def test_out_of_range_values_are_clamped():
+    sq = SlidingQuantile(4)
+    for x in (-5.0, 3.0):
+        sq.add(x)
+    assert sq.quantile(0.0) == pytest.approx(-1.0, abs=sq.width)
+    assert sq.quantile(1.0) == pytest.approx(0.0, abs=sq.width)
+
+
+def test_empty_and_clear():
+    sq = SlidingQuantile(10)
+    assert sq.quantile(0.5) is None
+    sq.add(-0.5)
+    sq.clear()
+    assert sq.count == 0
+    assert sq.quantile(0.5) is None
+    sq.add(-0.25)
+    assert sq.quantile(0.5) == pytest.approx(-0.25, abs=sq.width)
@@ -0,0 +1,112 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pi_client import migrate_db, train_loader
+from pi_client.db_manager import INSERT_SQL
+from pi_client.train_loader import MAX_FILL_S, _Ewma, _ForwardFill, _Resampler
+
+CHUNK_SIZES = [1, 7, 13, 16384]
+METRICS = ["cpu", "memory", "disk", "battery"]
+TOL = {"rtol": 1e-14, "atol": 1e-14}
+
+
+def _samples(dense, n=1500, seed=0):
+    """(ts_ms, values) with NaNs, several rows in some seconds, and short and long gaps."""
+    rng = np.random.default_rng(seed)
+    step = rng.choice([0, 250, 400, 1000, 1700], n) if dense else rng.integers(4_000, 20_000, n)
+    step[n // 3] = 45_000  # interpolated
+    step[2 * n // 3] = (MAX_FILL_S + 30) * 1000  # left empty
+    ts = 1_700_000_000_000 + np.cumsum(step)
+    values = rng.uniform(0, 100, (n, len(METRICS)))
+    values[rng.random((n, len(METRICS))) < 0.15] = np.nan
+    values[:5, 3] = np.nan  # battery starts late
+    return ts.astype(np.int64), values
+
+
+def _chunks(ts, values, size):
+    for i in range(0, len(ts), size):
+        yield ts[i:i + size], values[i:i + size]
+
+
+def _pandas_ffill(values):
+    return pd.DataFrame(values).ffill().to_numpy()
+
+
+def _pandas_resample(ts, values):
+    frame = pd.DataFrame(values, index=pd.to_datetime(ts, unit="ms"))
+    means = frame.resample("1s").mean()
+    # Interpolate only runs of at most MAX_FILL_S missing seconds
+    missing = means.isna().all(axis=1)
+    run = missing.ne(missing.shift()).cumsum()
+    run_len = missing.groupby(run).transform("sum")
+    filled = means.interpolate(method="linear")
+    return filled[~missing | (run_len <= MAX_FILL_S)].to_numpy()
+
+
+def _complete(ts, values):
+    filled = _pandas_ffill(values)
+    ok = ~np.isnan(filled).any(axis=1)
+    return ts[ok], filled[ok]
+
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_forward_fill(size):
+    ts, values = _samples(dense=True)
+    ffill = _ForwardFill(len(METRICS))
+    got = np.vstack([ffill(v) for _, v in _chunks(ts, values, size)])
+    np.testing.assert_array_equal(got, _pandas_ffill(values))
+
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_ewma(size):
+    ts, values = _complete(*_samples(dense=False))
+    ewma = _Ewma(0.4)
+    got = np.vstack([ewma(v) for _, v in _chunks(ts, values, size)])
+    expected = pd.DataFrame(values).ewm(alpha=0.4, adjust=False).mean().to_numpy()
+    np.testing.assert_allclose(got, expected, **TOL)
+
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_resampler(size):
+    ts, values = _complete(*_samples(dense=True))
+    resample = _Resampler()
+    out = [resample(t, v) for t, v in _chunks(ts, values, size)]
+    out.append(resample.flush())
+    got = np.vstack(out)
+    np.testing.assert_allclose(got, _pandas_resample(ts, values), **TOL)
+
+
+def _write_db(path, ts, values):
+    conn = sqlite3.connect(path)
+    migrate_db.migrate(conn)
+    rows = []
+    for t, (cpu, memory, disk, battery) in zip(ts, values.tolist()):
+        metrics = [None if np.isnan(x) else x for x in (cpu, memory, disk, np.nan, battery)]
+        rows.append((int(t), "pc", *metrics, None, None, None, None))
+    with conn:
+        conn.executemany(INSERT_SQL, rows)
+    conn.close()
+
+
+@pytest.mark.parametrize("dense", [True, False], ids=["resampled", "ewma"])
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_load_training_data(tmp_path, dense, size):
+    ts, values = _samples(dense=dense, n=600)
+    path = tmp_path / "usage_log.db"
+    _write_db(path, ts, values)
+
+    X, info = train_loader.load_training_data(path=str(path), chunk_rows=size)
+    assert info["resampled"] is dense
+    assert info["raw_rows"] == len(ts)
+
+    ts, values = _complete(ts, values)
+    if dense:
+        expected = _pandas_resample(ts, values)
+    else:
+        expected = pd.DataFrame(values).ewm(alpha=0.4, adjust=False).mean().to_numpy()
+    # Far below max_rows, so the reservoir keeps every row in order
+    assert info["rows"] == len(expected)
+    np.testing.assert_allclose(X, expected, **TOL)
@@ -0,0 +1,31 @@
+import pytest
+
+from shared import wire_format
+from pi_client.bench_wire import sample_frame
+
+
+@pytest.mark.parametrize("fmt", wire_format.available_formats())
+def test_round_trip(fmt):
+    frame = sample_frame()
+    frame["pids"] = {1234: {"name": "python", "cpu": 1.5}}
+    payload = wire_format.encode(frame, fmt)
+    decoded = wire_format.decode(payload)
+    if fmt == wire_format.JSON:
+        # JSON object keys are always strings
+        frame["pids"] = {"1234": frame["pids"][1234]}
+    assert decoded == frame
+
+
+def test_json_is_serialised_once():
+    payload = wire_format.encode({"seq": 1, "d": {"cpu": 1.0}}, wire_format.JSON)
+    # python-socketio passes strings through instead of re-encoding a dict
+    assert isinstance(payload, str)
+
+
+def test_small_frames_are_not_compressed():
+    if wire_format.MSGPACK_ZLIB not in wire_format.available_formats():
+        pytest.skip("msgpack is not installed")
+    small = wire_format.encode({"seq": 1}, wire_format.MSGPACK_ZLIB)
+    assert small[0] == wire_format.FLAG_MSGPACK
+    big = wire_format.encode(sample_frame(), wire_format.MSGPACK_ZLIB)
+    assert big[0] == wire_format.FLAG_MSGPACK | wire_format.FLAG_ZLIB